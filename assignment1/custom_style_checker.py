@@ -1,117 +1,200 @@
-import re
-import ast
+import os
+import sys
+
+# The analysis engine is shared with the functional checker in assignment2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assignment2'))
+from analysis_engine import ANALYSIS_VERSION, DEFAULT_DOCSTRING_PREVIEW, analyze_source, analyze_file_low_memory
+from batch_mode import run_batch
+from report_writers import naming_findings
+from phase_profiler import phase
+from memory_usage import reset_peak_rss, peak_rss_mb
+
+# Bump the last part when analyze_path's output changes for the same source
+CACHE_NAMESPACE = f"class-based:{ANALYSIS_VERSION}:2"
 
 
 class File:
-    def __init__(self, file):
+    def __init__(self, file, rules=None, checks=(), low_memory=False, docstring_preview=DEFAULT_DOCSTRING_PREVIEW):
+        """With low_memory, file must be opened in binary mode."""
         self.file = file
+        self.rules = rules
+        self.checks = checks
+        self.low_memory = low_memory
+        self.docstring_preview = docstring_preview
+        self._analysis = None
+
+    def analysis(self):
+        """Read and parse the file once; every report method works from this result."""
+        if self._analysis is None:
+            self.file.seek(0)
+            if self.low_memory:
+                self._analysis = analyze_file_low_memory(self.file, self.rules, self.checks, self.docstring_preview)
+                return self._analysis
+            with phase("read"):
+                file_content = self.file.read()
+            self._analysis = analyze_source(file_content, self.rules, self.checks)
+        return self._analysis
 
     def file_structure(self):
         """Analyzes the file structure: total lines, list of imported packages, classes, and top-level functions."""
-        lines = 0
-        packages = []
-        classes = []
-        top_level_functions = []
-
-        # Count non-empty lines
-        for line in self.file:
-            if line.strip():
-                lines += 1
-
-        self.file.seek(0)
-        # Parse the file using the AST module for packages, classes, and top-level functions
-        tree = ast.parse(self.file.read())
-        self.file.seek(0)
-
-        # Find packages (imports)
-        for node in tree.body:
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                packages.append(self._get_import_name(node))
-
-        # Find classes and top-level functions
-        for node in tree.body:
-            if isinstance(node, ast.ClassDef):
-                classes.append(node.name)
-            elif isinstance(node, ast.FunctionDef):
-                top_level_functions.append(node.name)
-
+        analysis = self.analysis()
         return {
-            "Total Lines": lines,
-            "Packages": packages,
-            "Classes": classes,
-            "Top-level Functions": top_level_functions,
+            "Total Lines": analysis["Total Lines"],
+            "Packages": analysis["Imports"],
+            "Classes": analysis["Classes"],
+            "Top-level Functions": analysis["Functions"],
         }
 
-    def _get_import_name(self, node):
-        """Helper function to extract the name of the package from an import statement."""
-        if isinstance(node, ast.Import):
-            return ', '.join(alias.name for alias in node.names)
-        elif isinstance(node, ast.ImportFrom):
-            module = node.module if node.module else ""
-            return f"{module}: {', '.join(alias.name for alias in node.names)}"
-
     def name_convention(self):
         """Check if class and function names follow naming conventions."""
-        self.file.seek(0)
-        incorrect_classes = []
-        incorrect_functions = []
-
-        for line in self.file:
-            line = line.strip()
-            if line.startswith("class "):
-                class_name = line.split()[1].split('(')[0].strip(':')  # Remove trailing colon
-                if not re.match(r'^[A-Z][a-zA-Z0-9]*$', class_name):  # Class names must start with uppercase
-                    incorrect_classes.append(class_name)
-
-            elif line.startswith("def "):
-                func_name = line.split()[1].split('(')[0]
-                if not re.match(r'^[a-z_][a-z0-9_]*$', func_name):  # Function names must be snake_case
-                    incorrect_functions.append(func_name)
-
+        analysis = self.analysis()
         return {
-            "Incorrect Classes": incorrect_classes,
-            "Incorrect Functions": incorrect_functions,
+            "Incorrect Classes": analysis["Incorrect Classes"],
+            "Incorrect Functions": analysis["Incorrect Functions"],
+            "Incorrect Variables": analysis["Incorrect Variables"],
+            "Incorrect Constants": analysis["Incorrect Constants"],
         }
 
     def docstrings(self):
         """Extract docstrings from classes and functions."""
-        self.file.seek(0)
         doc_report = []
-        for node in self._parse_ast():
-            if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
-                docstring = ast.get_docstring(node)
-                if docstring:
-                    doc_report.append(f"{node.name}:\n{docstring}\n")
-                else:
-                    doc_report.append(f"{node.name}: DocString not found\n")
+        for definition in self.analysis()["Definitions"]:
+            docstring = definition["Docstring"]
+            if docstring:
+                doc_report.append(f"{definition['Name']}:\n{docstring}\n")
+            else:
+                doc_report.append(f"{definition['Name']}: DocString not found\n")
         return doc_report
 
     def type_annotation_check(self):
         """Check if all functions and methods use type annotations, including __init__."""
         missing_annotations = []
-        for node in self._parse_ast():
-            if isinstance(node, ast.FunctionDef):
-                # Check if the function/method has a return type annotation
-                has_return_annotation = node.returns is not None
-
-                # Check if all arguments (except 'self' in methods) have type annotations
-                args_have_annotations = all(arg.annotation for arg in node.args.args if arg.arg != 'self')
-
-                if not has_return_annotation or not args_have_annotations:
-                    missing_annotations.append(node.name)
+        for definition in self.analysis()["Definitions"]:
+            if definition["Kind"] == "function":
+                if not definition["Returns Annotated"] or not definition["Args Annotated"]:
+                    missing_annotations.append(definition["Name"])
 
         if not missing_annotations:
             return "All functions and methods use type annotations."
         else:
             return f"Functions without type annotations: {', '.join(missing_annotations)}"
 
-    def _parse_ast(self):
-        """Parse the file as an AST."""
-        self.file.seek(0)  # Reset file pointer
-        return ast.walk(ast.parse(self.file.read()))
+    def rule_findings(self):
+        """Findings of the enabled plugin rules."""
+        return self.analysis()["Rule Findings"]
+
+    def findings(self):
+        """List every issue with its line, for the JSON Lines and SARIF reports."""
+        analysis = self.analysis()
+        findings = naming_findings(analysis["Naming Issues"]) + analysis["Rule Findings"]
+        for definition in analysis["Definitions"]:
+            if not definition["Docstring"]:
+                findings.append({"Rule": "missing-docstring", "Line": definition["Line"],
+                                 "Message": f"{definition['Name']} has no docstring."})
+            if definition["Kind"] == "function":
+                if not definition["Returns Annotated"] or not definition["Args Annotated"]:
+                    findings.append({"Rule": "missing-annotations", "Line": definition["Line"],
+                                     "Message": f"{definition['Name']} is missing type annotations."})
+        return sorted(findings, key=lambda finding: finding["Line"])
+
+
+def analyze_path(filename, rules=None, checks=(), low_memory=False, docstring_preview=DEFAULT_DOCSTRING_PREVIEW):
+    """Run every File check on one file, recording the error instead of raising if it cannot be parsed."""
+    try:
+        if low_memory:
+            reset_peak_rss()
+        with open(filename, 'rb' if low_memory else 'r') as check:
+            new_check = File(check, rules, checks, low_memory, docstring_preview)
+            with phase("file structure"):
+                structure_report = new_check.file_structure()
+            with phase("docstrings"):
+                doc_report = new_check.docstrings()
+            with phase("type annotations"):
+                annotation_check = new_check.type_annotation_check()
+            with phase("findings"):
+                findings = new_check.findings()
+            result = {
+                "Structure": structure_report,
+                "Names": new_check.name_convention(),
+                "Docstrings": doc_report,
+                "Type Annotations": annotation_check,
+                "Rule Findings": new_check.rule_findings(),
+                "Findings": findings,
+            }
+        if low_memory:
+            result["Peak RSS MB"] = peak_rss_mb()
+        return result
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as error:
+        return {"Error": f"{type(error).__name__}: {error}"}
+
+
+def write_report(txt, structure_report, name_issues, doc_report, annotation_check, rule_findings=()):
+    """Write the analysis report of one file to an open text file."""
+    txt.write("Python File Analysis Report\n")
+    txt.write("===========================\n")
+    txt.write("Here is the file structure:\n")
+    txt.write(f"Total non-empty lines: {structure_report['Total Lines']}\n")
+    txt.write(f"Packages imported: {', '.join(structure_report['Packages']) if structure_report['Packages'] else 'None'}\n")
+    txt.write(f"Classes defined: {', '.join(structure_report['Classes']) if structure_report['Classes'] else 'None'}\n")
+    txt.write(f"Top-level functions: {', '.join(structure_report['Top-level Functions']) if structure_report['Top-level Functions'] else 'None'}\n\n")
+
+    txt.write("Here are the Doc Strings:\n")
+    txt.write("===========================\n")
+    for doc in doc_report:
+        txt.write(doc + '\n')
+
+    txt.write("Naming Convention Issues:\n")
+    txt.write("===========================\n")
+    if name_issues["Incorrect Classes"]:
+        txt.write("Incorrect Class Names:\n")
+        for cls in name_issues["Incorrect Classes"]:
+            txt.write(f"- {cls}\n")
+    else:
+        txt.write("All class names follow the CamelCase convention.\n")
+
+    if name_issues["Incorrect Functions"]:
+        txt.write("Incorrect Function Names:\n")
+        for fn in name_issues["Incorrect Functions"]:
+            txt.write(f"- {fn}\n")
+    else:
+        txt.write("All function names follow the snake_case convention.\n")
+
+    # Variable and constant rules are opt-in, so these sections only appear when something was found
+    if name_issues["Incorrect Variables"]:
+        txt.write("Incorrect Variable Names:\n")
+        for name in name_issues["Incorrect Variables"]:
+            txt.write(f"- {name}\n")
+
+    if name_issues["Incorrect Constants"]:
+        txt.write("Incorrect Module-level Names:\n")
+        for name in name_issues["Incorrect Constants"]:
+            txt.write(f"- {name}\n")
+
+    txt.write("Type Annotation Check:\n")
+    txt.write("===========================\n")
+    txt.write(annotation_check + '\n')
+
+    if rule_findings:
+        txt.write("Additional Rule Findings:\n")
+        txt.write("===========================\n")
+        for finding in rule_findings:
+            txt.write(f"- line {finding['Line']}: {finding['Message']} [{finding['Rule']}]\n")
+
+
+def write_text_report(txt, result):
+    """Write the report of one file into the combined text report."""
+    write_report(txt, result["Structure"], result["Names"], result["Docstrings"], result["Type Annotations"],
+                 result["Rule Findings"])
+    if result.get("Peak RSS MB") is not None:
+        txt.write(f"Peak memory while analyzing: {result['Peak RSS MB']:.1f} MB\n")
+
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_batch(argv, analyze_path, write_text_report, "custom_style_checker", CACHE_NAMESPACE,
+                           "Python style checker"))
 
-def main():
     filename = input("Please enter the Python file name (must include .py extension): ").strip()
     while not filename.endswith('.py'):
         print("Must include .py extension.")
@@ -129,38 +212,7 @@ def main():
         annotation_check = new_check.type_annotation_check()
 
     with open(report, 'w') as txt:
-        txt.write("Python File Analysis Report\n")
-        txt.write("===========================\n")
-        txt.write("Here is the file structure:\n")
-        txt.write(f"Total non-empty lines: {structure_report['Total Lines']}\n")
-        txt.write(f"Packages imported: {', '.join(structure_report['Packages']) if structure_report['Packages'] else 'None'}\n")
-        txt.write(f"Classes defined: {', '.join(structure_report['Classes']) if structure_report['Classes'] else 'None'}\n")
-        txt.write(f"Top-level functions: {', '.join(structure_report['Top-level Functions']) if structure_report['Top-level Functions'] else 'None'}\n\n")
-
-        txt.write("Here are the Doc Strings:\n")
-        txt.write("===========================\n")
-        for doc in doc_report:
-            txt.write(doc + '\n')
-
-        txt.write("Naming Convention Issues:\n")
-        txt.write("===========================\n")
-        if name_issues["Incorrect Classes"]:
-            txt.write("Incorrect Class Names:\n")
-            for cls in name_issues["Incorrect Classes"]:
-                txt.write(f"- {cls}\n")
-        else:
-            txt.write("All class names follow the CamelCase convention.\n")
-
-        if name_issues["Incorrect Functions"]:
-            txt.write("Incorrect Function Names:\n")
-            for fn in name_issues["Incorrect Functions"]:
-                txt.write(f"- {fn}\n")
-        else:
-            txt.write("All function names follow the snake_case convention.\n")
-
-        txt.write("Type Annotation Check:\n")
-        txt.write("===========================\n")
-        txt.write(annotation_check + '\n')
+        write_report(txt, structure_report, name_issues, doc_report, annotation_check)
 
 
 if __name__ == "__main__":
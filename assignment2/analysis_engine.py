@@ -0,0 +1,350 @@
+import re
+import ast
+import time
+import inspect
+import tokenize
+import argparse
+
+import phase_profiler
+from phase_profiler import phase
+
+# Bump whenever the results produced for a given source change, so cached results are not reused
+ANALYSIS_VERSION = 7
+
+CLASS_NAME_PATTERN = re.compile(r'^[A-Z][a-zA-Z0-9]*$')  # Class names must start with uppercase
+FUNCTION_NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')  # Function names must be snake_case
+VARIABLE_NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')  # Variables assigned in functions: snake_case
+CONSTANT_NAME_PATTERN = re.compile(r'^[A-Z_][A-Z0-9_]*$')  # Names assigned at module level: UPPER_CASE
+
+BUILTIN_NAMING_RULES = {
+    "class": CLASS_NAME_PATTERN,
+    "function": FUNCTION_NAME_PATTERN,
+    "variable": VARIABLE_NAME_PATTERN,
+    "constant": CONSTANT_NAME_PATTERN,
+}
+
+# Characters of each docstring kept by the low-memory analysis
+DEFAULT_DOCSTRING_PREVIEW = 80
+
+# The low-memory analysis parses about this many lines at a time
+LOW_MEMORY_CHUNK_LINES = 2000
+
+# Lines starting with these continue the statement above them rather than starting a new one
+CONTINUATION_PATTERN = re.compile(r'(else|elif|except|finally)\b')
+
+# Variable and constant names are only checked when asked for
+DEFAULT_NAMING_RULES = {
+    "class": CLASS_NAME_PATTERN,
+    "function": FUNCTION_NAME_PATTERN,
+    "variable": None,
+    "constant": None,
+}
+
+
+def naming_rules(overrides=None):
+    """Return the default naming rules updated with overrides, a dict of kind -> pattern string, pattern or None."""
+    rules = dict(DEFAULT_NAMING_RULES)
+    for kind, pattern in (overrides or {}).items():
+        if kind not in rules:
+            raise ValueError(f"Unknown naming rule {kind!r}, expected one of: {', '.join(rules)}")
+        rules[kind] = re.compile(pattern) if isinstance(pattern, str) else pattern
+    return rules
+
+
+def parse_naming_rule(text):
+    """Parse a command line rule: 'kind=REGEX', 'kind' for the built-in pattern, or 'kind=off'."""
+    kind, _, pattern = text.partition('=')
+    kind = kind.strip()
+    if kind not in BUILTIN_NAMING_RULES:
+        raise ValueError(f"Unknown naming rule {kind!r}, expected one of: {', '.join(BUILTIN_NAMING_RULES)}")
+    if not pattern:
+        return kind, BUILTIN_NAMING_RULES[kind]
+    if pattern == 'off':
+        return kind, None
+    return kind, re.compile(pattern)
+
+
+def describe_rules(rules):
+    """A stable text form of the rules, used to keep cached results of different rule sets apart."""
+    return ';'.join(f"{kind}={pattern.pattern if pattern else 'off'}" for kind, pattern in sorted(rules.items()))
+
+
+def add_naming_arguments(parser):
+    """Register the --naming-rule option shared by both checkers' batch mode."""
+    def rule(text):
+        try:
+            return parse_naming_rule(text)
+        except (ValueError, re.error) as error:
+            raise argparse.ArgumentTypeError(str(error))
+
+    parser.add_argument('--naming-rule', type=rule, action='append', default=[], metavar='KIND[=REGEX|off]',
+                        help="override a naming rule (class, function, variable, constant); "
+                             "give only the kind to turn on its built-in pattern")
+    return parser
+
+
+def add_memory_arguments(parser):
+    """Register the low-memory options shared by both checkers' batch mode."""
+    parser.add_argument('--low-memory', action='store_true',
+                        help="analyze huge files with bounded memory: stream line counts, free the source after "
+                             "parsing, keep only docstring previews and report each file's peak memory")
+    parser.add_argument('--docstring-preview', type=int, default=DEFAULT_DOCSTRING_PREVIEW, metavar='CHARS',
+                        help=f"characters of each docstring kept with --low-memory (default: {DEFAULT_DOCSTRING_PREVIEW})")
+    return parser
+
+
+def count_lines(file_content):
+    """Count non-empty lines in the file content."""
+    return sum(1 for line in file_content.splitlines() if line.strip())
+
+
+class SourceAnalyzer(ast.NodeVisitor):
+    """Collect imports, definitions, docstrings, annotations and naming issues in one walk over the AST."""
+
+    def __init__(self, rules=None, checks=(), docstring_preview=None):
+        self.rules = rules if rules is not None else DEFAULT_NAMING_RULES
+        self.docstring_preview = docstring_preview  # Keep only this many characters of each docstring
+        self.rule_findings = []
+        # Rule id -> [calls, seconds], kept only while profiling
+        self.rule_times = {} if phase_profiler.ACTIVE is not None else None
+        self._dispatch = {}  # Node class -> plugin rules that asked for it
+        for check in checks:
+            for node_type in check.node_types:
+                self._dispatch.setdefault(node_type, []).append(check)
+        self.imports = []
+        self.classes = []
+        self.functions = []
+        self.definitions = []
+        self.incorrect_classes = []
+        self.incorrect_functions = []
+        self.incorrect_variables = {}  # Used as an ordered set
+        self.incorrect_constants = {}
+        self.naming_issues = []  # Every incorrect name with its kind and line, for tools that need locations
+        self._scope = []  # Enclosing class/function nodes of the node being visited
+        self._top_statement = None  # The statement of the module body being visited
+
+    @property
+    def scope(self):
+        """The class and function nodes enclosing the node being visited, outermost first."""
+        return self._scope
+
+    def visit(self, node):
+        for check in self._dispatch.get(node.__class__, ()):
+            if self.rule_times is None:
+                self.rule_findings.extend(check.check(node, self))
+            else:
+                start = time.perf_counter()
+                self.rule_findings.extend(check.check(node, self))
+                times = self.rule_times.setdefault(check.rule_id, [0, 0.0])
+                times[0] += 1
+                times[1] += time.perf_counter() - start
+        return super().visit(node)
+
+    def _top_level(self, node):
+        """Whether node is a statement of the module body itself, not nested in a block or definition."""
+        return node is self._top_statement
+
+    def visit_Import(self, node):
+        if self._top_level(node):
+            self.imports.append(', '.join(alias.name for alias in node.names))
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        if self._top_level(node):
+            module = node.module if node.module else ""
+            self.imports.append(f"{module}: {', '.join(alias.name for alias in node.names)}")
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        if self._top_level(node):
+            self.classes.append(node.name)
+        if not self._follows("class", node.name):
+            self.incorrect_classes.append(node.name)
+            self._naming_issue("class", node)
+
+        self.definitions.append(self._definition(node, "class"))
+        self._visit_scope(node)
+
+    def visit_FunctionDef(self, node):
+        if self._top_level(node):
+            self.functions.append(node.name)
+        if not self._follows("function", node.name):
+            self.incorrect_functions.append(node.name)
+            self._naming_issue("function", node)
+
+        definition = self._definition(node, "function")
+        definition["Returns Annotated"] = node.returns is not None
+        definition["Args Annotated"] = all(arg.annotation for arg in node.args.args if arg.arg != 'self')
+        self.definitions.append(definition)
+        self._visit_scope(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Module(self, node):
+        # Only statements of the module body itself count as top level: imports, classes and
+        # functions nested in if/try blocks are not listed, and their assignments are not constants,
+        # nor are loop, with and comprehension targets
+        for statement in node.body:
+            self._top_statement = statement
+            if isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name) and isinstance(name.ctx, ast.Store):
+                            self._check_constant(name)
+            self.visit(statement)
+
+    def _check_constant(self, node):
+        if node.id.startswith('__'):
+            return
+        if not self._follows("constant", node.id) and node.id not in self.incorrect_constants:
+            self.incorrect_constants[node.id] = None
+            self._naming_issue("constant", node)
+
+    def visit_Name(self, node):
+        if not isinstance(node.ctx, ast.Store) or node.id.startswith('__'):
+            return
+        if self._scope and not isinstance(self._scope[-1], ast.ClassDef):
+            if not self._follows("variable", node.id) and node.id not in self.incorrect_variables:
+                self.incorrect_variables[node.id] = None
+                self._naming_issue("variable", node)
+
+    def _follows(self, kind, name):
+        """Check a name against the rule for its kind; a rule that is switched off accepts every name."""
+        pattern = self.rules.get(kind)
+        return pattern is None or pattern.fullmatch(name) is not None
+
+    def _naming_issue(self, kind, node):
+        name = node.id if isinstance(node, ast.Name) else node.name
+        self.naming_issues.append({"Kind": kind, "Name": name, "Line": node.lineno})
+
+    def _definition(self, node, kind):
+        """Build the record kept for every class and function, in source order."""
+        parent = self._scope[-1] if self._scope else None
+        return {
+            "Kind": kind,
+            "Name": node.name,
+            "Line": node.lineno,
+            "Parent": parent.name if isinstance(parent, ast.ClassDef) else None,
+            # A method of a top-level class, rather than of a nested class that may share its name
+            "Parent Top Level": isinstance(parent, ast.ClassDef) and self._top_level(parent),
+            "Top Level": self._top_level(node),
+            "Docstring": ast.get_docstring(node) if self.docstring_preview is None else self._docstring_preview(node),
+        }
+
+    def _docstring_preview(self, node):
+        """The start of the docstring, without cleaning up the whole of a possibly huge string."""
+        if not (node.body and isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant)
+                and isinstance(node.body[0].value.value, str)):
+            return None
+        raw = node.body[0].value.value
+        # Cleaning removes indentation, so clean a generous slice and cut the result down
+        window = self.docstring_preview * 4
+        cleaned = inspect.cleandoc(raw[:window])
+        preview = cleaned[:self.docstring_preview]
+        if not preview:
+            return None
+        truncated = len(raw) > window or len(cleaned) > len(preview)
+        return preview + '...' if truncated else preview
+
+    def _visit_scope(self, node):
+        self._scope.append(node)
+        self.generic_visit(node)
+        self._scope.pop()
+
+
+def analyze_source(file_content, rules=None, checks=()):
+    """Parse the source once and return everything both style checkers report on.
+
+    checks are plugin rule instances (see rule_plugins), run during the same walk.
+    """
+    analyzer = SourceAnalyzer(rules, checks)
+    with phase("parse"):
+        tree = ast.parse(file_content)
+    with phase("walk"):
+        analyzer.visit(tree)
+    with phase("count lines"):
+        total_lines = count_lines(file_content)
+    return analyzer_results(analyzer, total_lines)
+
+
+def analyzer_results(analyzer, total_lines):
+    """The analysis of a file, from an analyzer that has visited its whole tree."""
+    if analyzer.rule_times:
+        for rule_id, (calls, seconds) in analyzer.rule_times.items():
+            phase_profiler.ACTIVE.add_total(f"rule {rule_id}", seconds, calls)
+
+    return {
+        "Total Lines": total_lines,
+        "Imports": analyzer.imports,
+        "Classes": analyzer.classes,
+        "Functions": analyzer.functions,
+        "Incorrect Classes": analyzer.incorrect_classes,
+        "Incorrect Functions": analyzer.incorrect_functions,
+        "Incorrect Variables": list(analyzer.incorrect_variables),
+        "Incorrect Constants": list(analyzer.incorrect_constants),
+        "Naming Issues": analyzer.naming_issues,
+        "Rule Findings": analyzer.rule_findings,
+        "Definitions": analyzer.definitions,
+    }
+
+
+def _may_start_statement(line, last_code_line):
+    """Whether line may begin a new top-level statement; only a guess, which parsing the chunk confirms."""
+    if not line or line[0] in ' \t\r\n#)]}':
+        return False
+    return not CONTINUATION_PATTERN.match(line) and not last_code_line.startswith('@')
+
+
+def analyze_file_low_memory(file, rules=None, checks=(), docstring_preview=DEFAULT_DOCSTRING_PREVIEW,
+                            chunk_lines=LOW_MEMORY_CHUNK_LINES):
+    """Like analyze_source, for very large files: takes a file opened in binary mode.
+
+    The file is streamed and parsed a group of top-level statements (about chunk_lines lines)
+    at a time, so neither the whole source nor the whole AST is ever in memory. Only the first
+    docstring_preview characters of each docstring are kept. A cut that turns out to be inside
+    a statement (a multi-line string, say) makes the chunk fail to parse; it then grows until
+    it parses, so the result is the same as parsing the whole file.
+    """
+    encoding, _ = tokenize.detect_encoding(file.readline)
+    file.seek(0)
+    analyzer = SourceAnalyzer(rules, checks, docstring_preview=docstring_preview)
+    total_lines = 0
+    chunk = []
+    chunk_start = 1  # Line number of the first line of the chunk
+    next_attempt = chunk_lines
+    last_code_line = ''
+
+    def analyze_chunk():
+        with phase("parse"):
+            tree = ast.parse(''.join(chunk))
+        ast.increment_lineno(tree, chunk_start - 1)
+        with phase("walk"):
+            analyzer.visit(tree)
+
+    for raw_line in file:
+        line = raw_line.decode(encoding)
+        if len(chunk) >= next_attempt and _may_start_statement(line, last_code_line):
+            try:
+                analyze_chunk()
+            except SyntaxError:
+                next_attempt = len(chunk) * 2  # Growing geometrically keeps reparsing linear overall
+            else:
+                chunk_start += len(chunk)
+                chunk = []
+                next_attempt = chunk_lines
+
+        chunk.append(line)
+        stripped = line.strip()
+        if stripped:
+            total_lines += 1
+            if not stripped.startswith('#'):
+                last_code_line = line
+
+    try:
+        analyze_chunk()
+    except SyntaxError as error:
+        if error.lineno is not None:
+            error.lineno += chunk_start - 1
+        raise
+    return analyzer_results(analyzer, total_lines)
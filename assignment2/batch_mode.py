@@ -0,0 +1,97 @@
+import sys
+import argparse
+from functools import partial
+from contextlib import ExitStack
+
+from analysis_engine import naming_rules, describe_rules, add_naming_arguments, add_memory_arguments
+from parallel_runner import collect_files, run_parallel, add_batch_arguments
+from result_cache import ResultCache, run_cached, add_cache_arguments
+from report_writers import write_reports, add_report_arguments
+from rule_plugins import describe_checks, add_rule_arguments, checks_from_arguments
+from phase_profiler import Profiler, ProfiledAnalysis, collect_profiles, add_profile_arguments
+from git_changes import GitError, changed_python_files, changed_line_ranges, only_changed_lines, add_git_arguments
+from watch_daemon import serve, add_daemon_arguments
+
+
+def build_parser(description):
+    """The command line shared by both checkers' batch mode."""
+    parser = argparse.ArgumentParser(description=description)
+    add_batch_arguments(parser)
+    add_cache_arguments(parser)
+    add_naming_arguments(parser)
+    add_memory_arguments(parser)
+    add_report_arguments(parser)
+    add_rule_arguments(parser)
+    add_profile_arguments(parser)
+    add_git_arguments(parser)
+    add_daemon_arguments(parser)
+    return parser
+
+
+def run_batch(argv, analyze_path, write_text, tool_name, cache_namespace, description):
+    """Check every Python file under the paths in argv and write one combined report. Returns the exit status.
+
+    analyze_path(filename, rules=..., checks=..., low_memory=..., docstring_preview=...) analyzes
+    one file in a worker process and write_text(stream, result) writes its part of the text report.
+    With --serve the paths are watched instead and results are served from memory until shut down.
+    """
+    parser = build_parser(description)
+    args = parser.parse_args(argv)
+    checks = checks_from_arguments(parser, args)
+    from_git = args.git is not None or args.staged
+    if args.changed_lines_only and not from_git:
+        parser.error("--changed-lines-only needs --git or --staged")
+    if not args.paths and not from_git:
+        parser.error("give the paths to check, or --git / --staged")
+    if args.serve and from_git:
+        parser.error("--serve watches the given paths and cannot be combined with --git or --staged")
+    try:
+        if from_git:
+            # Paths, if any, narrow the changed files down
+            files = changed_python_files(args.git, args.staged, args.paths)
+            ranges = changed_line_ranges(files, args.git, args.staged) if args.changed_lines_only else None
+        else:
+            files = collect_files(args.paths)
+            ranges = None
+    except (FileNotFoundError, GitError) as error:
+        parser.error(str(error))
+
+    rules = naming_rules(dict(args.naming_rule))
+    analyze = partial(analyze_path, rules=rules, checks=checks,
+                      low_memory=args.low_memory, docstring_preview=args.docstring_preview)
+    if args.serve:
+        return serve(args.serve, analyze, args.paths, workers=args.workers, poll_interval=args.poll_interval)
+    write = partial(write_reports, args.output, report_format=args.format, write_text=write_text, tool_name=tool_name)
+
+    profiler = cache = None
+    with ExitStack() as stack:
+        if args.profile or args.profile_trace:
+            # Profiling measures a cold run, so every file is analyzed
+            profiler = Profiler()
+            results = run_parallel(ProfiledAnalysis(analyze), files, workers=args.workers, chunk_size=args.chunk_size)
+            results = collect_profiles(results, profiler)
+        elif args.no_cache:
+            results = run_parallel(analyze, files, workers=args.workers, chunk_size=args.chunk_size)
+        else:
+            namespace = f"{cache_namespace}:{describe_rules(rules)}:{describe_checks(checks)}"
+            if args.low_memory:
+                namespace += f":low-memory={args.docstring_preview}"
+            cache = stack.enter_context(ResultCache(args.cache, namespace, max_entries=args.cache_size))
+            results = run_cached(analyze, files, cache, workers=args.workers, chunk_size=args.chunk_size)
+
+        if ranges is not None:
+            results = only_changed_lines(results, ranges)
+        failed = write(results)
+
+    if profiler is not None:
+        print('\n'.join(profiler.summary()), file=sys.stderr)
+        if args.profile_trace:
+            profiler.write_chrome_trace(args.profile_trace)
+            print(f"Chrome trace written to {args.profile_trace}.", file=sys.stderr)
+    if cache is not None:
+        print(f"Reused {cache.hits} cached results.", file=sys.stderr)
+
+    # Status goes to stderr so it never mixes with a report streamed to standard output
+    destination = "standard output" if args.output == '-' else args.output
+    print(f"Checked {len(files)} files, report written to {destination}.", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+from memory_usage import reset_peak_rss, peak_rss_mb
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Implementation name -> (directory, module); each module provides analyze_path(filename)
+IMPLEMENTATIONS = {
+    "functional": (HERE, "functional_style_checker"),
+    "class-based": (os.path.join(HERE, '..', 'assignment1'), "custom_style_checker"),
+}
+
+
+def small_module(rng, index):
+    """A typical hand-written module of about 80 lines, with a few naming and docstring issues."""
+    lines = ["import os", "import sys", "from typing import List", ""]
+    for c in range(2):
+        class_name = f"Widget{index}x{c}" if rng.random() < 0.9 else f"widget_{index}_{c}"
+        lines += [f"class {class_name}:", '    """A generated class."""', "",
+                  "    def __init__(self, value: int):", "        self.value = value", ""]
+        for m in range(4):
+            method_name = f"method_{m}" if rng.random() < 0.9 else f"Method{m}"
+            lines.append(f"    def {method_name}(self, x: int) -> int:")
+            if rng.random() < 0.5:
+                lines.append('        """Return the value plus x."""')
+            lines += [f"        total = self.value + x * {m}", "        return total", ""]
+    for f in range(4):
+        lines += [f"def helper_{f}(items, factor=2):", "    result = []", "    for item in items:",
+                  "        result.append(item * factor)", "    return result", "", ""]
+    return '\n'.join(lines) + '\n'
+
+
+def large_module(line_count):
+    """A generated module of about line_count lines made of many small functions."""
+    lines = ['"""A large generated module."""', "import math", ""]
+    index = 0
+    while len(lines) < line_count:
+        lines += [f"def generated_{index}(a: float, b: float) -> float:",
+                  f'    """Generated function {index}."""',
+                  "    if a > b:", "        return math.sqrt(a - b)",
+                  f"    return (a + b) / {index % 7 + 1}", "", ""]
+        index += 1
+    return '\n'.join(lines) + '\n'
+
+
+def nested_module(depth):
+    """Classes nested depth levels deep, each with a method, to stress recursion in the walk."""
+    lines = []
+    for level in range(depth):
+        indent = '    ' * level
+        lines += [f"{indent}class Level{level}:", f'{indent}    """Nesting level {level}."""',
+                  f"{indent}    def method_{level}(self):", f"{indent}        return {level}"]
+    return '\n'.join(lines) + '\n'
+
+
+def generate_corpus(directory, small_files, large_files, large_lines, nested_files, nesting_depth, seed=0):
+    """Write the synthetic corpus into directory and return {corpus name: list of files}."""
+    rng = random.Random(seed)
+    corpora = {"small": [], "large": [], "nested": []}
+
+    def write(name, kind, content):
+        path = os.path.join(directory, kind, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        corpora[kind].append(path)
+
+    for index in range(small_files):
+        # Spread small files over sub-packages the way a real repository would
+        write(os.path.join(f"package_{index // 100}", f"module_{index}.py"), "small", small_module(rng, index))
+    for index in range(large_files):
+        write(f"generated_{index}.py", "large", large_module(large_lines))
+    for index in range(nested_files):
+        write(f"nested_{index}.py", "nested", nested_module(nesting_depth))
+    return {name: files for name, files in corpora.items() if files}
+
+
+def count_corpus_lines(files):
+    total = 0
+    for filename in files:
+        with open(filename, 'rb') as file:
+            total += sum(1 for _ in file)
+    return total
+
+
+def measure(implementation, files, low_memory=False):
+    """Analyze every file with one implementation; runs in a fresh process so peak memory is its own.
+
+    Returns (seconds, peak MB, errors), errors being the messages of the files that could not be analyzed.
+    """
+    directory, module_name = IMPLEMENTATIONS[implementation]
+    sys.path.insert(0, directory)
+    analyze_path = importlib.import_module(module_name).analyze_path
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    results = [analyze_path(filename, low_memory=low_memory) for filename in files]
+    seconds = time.perf_counter() - start
+    errors = [f"{filename}: {result['Error']}" for filename, result in zip(files, results) if "Error" in result]
+    return seconds, peak_rss_mb(), errors
+
+
+def run_benchmarks(corpora, implementations, repeat, low_memory=False):
+    """Measure every implementation on every corpus, keeping the fastest of repeat runs."""
+    results = []
+    for corpus, files in corpora.items():
+        lines = count_corpus_lines(files)
+        for implementation in implementations:
+            runs = []
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    runs.append(executor.submit(measure, implementation, files, low_memory).result())
+            seconds = min(run[0] for run in runs)
+            peaks = [run[1] for run in runs if run[1] is not None]
+            errors = max((run[2] for run in runs), key=len)
+            results.append({
+                "Implementation": implementation,
+                "Corpus": corpus,
+                "Files": len(files),
+                "Lines": lines,
+                "Seconds": seconds,
+                "Lines/s": lines / seconds,
+                "Files/s": len(files) / seconds,
+                "Peak MB": max(peaks) if peaks else None,
+                "Errors": errors,
+            })
+    return results
+
+
+def format_results(results, baseline=None):
+    """Lines of the results table, with the change in lines/s against the baseline when there is one."""
+    baseline = {(b["Implementation"], b["Corpus"]): b for b in (baseline or [])}
+    lines = [f"{'Implementation':<14} {'Corpus':<8} {'Files':>6} {'Lines':>9} {'Seconds':>8} "
+             f"{'Lines/s':>10} {'Files/s':>9} {'Peak MB':>8} {'vs base':>8}"]
+    for r in results:
+        peak = f"{r['Peak MB']:.1f}" if r['Peak MB'] is not None else "n/a"
+        previous = baseline.get((r["Implementation"], r["Corpus"]))
+        change = f"{(r['Lines/s'] / previous['Lines/s'] - 1) * 100:+.1f}%" if previous else ""
+        lines.append(f"{r['Implementation']:<14} {r['Corpus']:<8} {r['Files']:>6} {r['Lines']:>9} {r['Seconds']:>8.3f} "
+                     f"{r['Lines/s']:>10.0f} {r['Files/s']:>9.1f} {peak:>8} {change:>8}")
+    return lines
+
+
+def regressions(results, baseline, tolerance):
+    """Results whose lines/s dropped by more than tolerance (a fraction) against the baseline."""
+    baseline = {(b["Implementation"], b["Corpus"]): b for b in baseline}
+    slower = []
+    for r in results:
+        previous = baseline.get((r["Implementation"], r["Corpus"]))
+        if previous and r["Lines/s"] < previous["Lines/s"] * (1 - tolerance):
+            slower.append(r)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark both style checkers on a synthetic codebase")
+    parser.add_argument('--small-files', type=int, default=2000, help="number of small modules (default: 2000)")
+    parser.add_argument('--large-files', type=int, default=3, help="number of large modules (default: 3)")
+    parser.add_argument('--large-lines', type=int, default=50_000, help="lines per large module (default: 50000)")
+    parser.add_argument('--nested-files', type=int, default=20, help="number of deeply nested modules (default: 20)")
+    parser.add_argument('--nesting-depth', type=int, default=50, help="class nesting depth (default: 50)")
+    parser.add_argument('--implementation', choices=IMPLEMENTATIONS, action='append',
+                        help="benchmark only this implementation (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement, fastest is kept (default: 3)")
+    parser.add_argument('--low-memory', action='store_true', help="benchmark the checkers' low-memory mode")
+    parser.add_argument('--corpus-dir', help="keep the generated corpus here instead of a temporary directory")
+    parser.add_argument('--baseline', help="JSON file of earlier results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write these results to the --baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed drop in lines/s before a result counts as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+
+    # Throughput is only comparable between runs over the same corpus in the same mode
+    corpus = {
+        "Small Files": args.small_files, "Large Files": args.large_files, "Large Lines": args.large_lines,
+        "Nested Files": args.nested_files, "Nesting Depth": args.nesting_depth, "Low Memory": args.low_memory,
+    }
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            saved = json.load(file)
+        if not isinstance(saved, dict) or saved.get("Corpus") != corpus:
+            parser.error(f"{args.baseline} was measured on a different corpus "
+                         f"({saved.get('Corpus') if isinstance(saved, dict) else 'unknown'}); "
+                         "run with the same options or save a new baseline")
+        baseline = saved["Results"]
+
+    implementations = args.implementation or list(IMPLEMENTATIONS)
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = args.corpus_dir or temporary
+        corpora = generate_corpus(directory, args.small_files, args.large_files, args.large_lines,
+                                  args.nested_files, args.nesting_depth)
+        results = run_benchmarks(corpora, implementations, args.repeat, args.low_memory)
+    print('\n'.join(format_results(results, baseline)))
+
+    # Timings of files that failed to parse measure no real work, so such a run proves nothing
+    failed = [r for r in results if r["Errors"]]
+    for r in failed:
+        print(f"Error: {r['Implementation']} could not analyze {len(r['Errors'])} of the {r['Files']} "
+              f"{r['Corpus']} files, for example {r['Errors'][0]}", file=sys.stderr)
+    if failed:
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({"Corpus": corpus, "Results": results}, file, indent=4)
+        print(f"Baseline saved to {args.baseline}.")
+    elif baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        for r in slower:
+            print(f"Regression: {r['Implementation']} on {r['Corpus']} is more than {args.tolerance:.0%} slower than the baseline.")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,125 +1,124 @@
-import re
-import ast
+import sys
 
+from analysis_engine import ANALYSIS_VERSION, DEFAULT_DOCSTRING_PREVIEW, analyze_source, analyze_file_low_memory
+from batch_mode import run_batch
+from report_writers import naming_findings
+from phase_profiler import phase
+from memory_usage import reset_peak_rss, peak_rss_mb
 
-def count_lines(file_content):
-    """Count non-empty lines in the file content."""
-    return sum(1 for line in file_content.splitlines() if line.strip())
+# Bump the last part when analyze_path's output changes for the same source
+CACHE_NAMESPACE = f"functional:{ANALYSIS_VERSION}:2"
 
 
-def parse_ast(file_content):
-    """Parse the file content into an AST tree."""
-    return ast.parse(file_content)
+def documented_definitions(definitions):
+    """Yield (label, definition) for the top-level classes and functions and the methods of top-level classes."""
+    for definition in definitions:
+        name = definition["Name"]
+        if definition["Kind"] == "class" and definition["Top Level"]:
+            yield f"Class {name}", definition
+        elif definition["Kind"] == "function" and definition["Top Level"]:
+            yield f"Function {name}", definition
+        elif definition["Kind"] == "function" and definition["Parent Top Level"]:
+            yield f"Method {definition['Parent']}.{name}", definition
 
 
-def extract_imports(tree):
-    """Extract imported packages from the AST tree."""
-    imports = []
-    for node in tree.body:
-        if isinstance(node, ast.Import):
-            imports.append(', '.join(alias.name for alias in node.names))
-        elif isinstance(node, ast.ImportFrom):
-            module = node.module if node.module else ""
-            imports.append(f"{module}: {', '.join(alias.name for alias in node.names)}")
-    return imports
-
-
-def extract_classes_and_functions(tree):
-    """Extract class and top-level function names from the AST tree."""
-    classes = [node.name for node in tree.body if isinstance(node, ast.ClassDef)]
-    functions = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
-    return classes, functions
-
-
-def check_name_conventions(file_content):
-    """Check if class and function names follow naming conventions."""
-    incorrect_classes = []
-    incorrect_functions = []
-
-    for line in file_content.splitlines():
-        line = line.strip()
-        if line.startswith("class "):
-            class_name = line.split()[1].split('(')[0].strip(':')
-            if not re.match(r'^[A-Z][a-zA-Z0-9]*$', class_name):
-                incorrect_classes.append(class_name)
-        elif line.startswith("def "):
-            func_name = line.split()[1].split('(')[0]
-            if not re.match(r'^[a-z_][a-z0-9_]*$', func_name):
-                incorrect_functions.append(func_name)
-
-    return incorrect_classes, incorrect_functions
-
-
-def extract_docstrings(tree):
+def extract_docstrings(definitions):
     """Extract docstrings from classes and functions, including methods in classes."""
     docstrings = []
 
-    for node in tree.body:
-        if isinstance(node, ast.ClassDef):
-            class_doc = ast.get_docstring(node)
-            if class_doc:
-                docstrings.append(f"Class {node.name}:\n{class_doc}\n")
-            else:
-                docstrings.append(f"Class {node.name}: DocString not found\n")
-
-            # Check for docstrings in class methods
-            for item in node.body:
-                if isinstance(item, ast.FunctionDef):
-                    method_doc = ast.get_docstring(item)
-                    if method_doc:
-                        docstrings.append(f"Method {node.name}.{item.name}:\n{method_doc}\n")
-                    else:
-                        docstrings.append(f"Method {node.name}.{item.name}: DocString not found\n")
-
-        elif isinstance(node, ast.FunctionDef):
-            func_doc = ast.get_docstring(node)
-            if func_doc:
-                docstrings.append(f"Function {node.name}:\n{func_doc}\n")
-            else:
-                docstrings.append(f"Function {node.name}: DocString not found\n")
+    for label, definition in documented_definitions(definitions):
+        doc = definition["Docstring"]
+        if doc:
+            docstrings.append(f"{label}:\n{doc}\n")
+        else:
+            docstrings.append(f"{label}: DocString not found\n")
 
     return docstrings
 
 
-def check_type_annotations(tree):
-    """Check if all functions and methods use type annotations."""
-    def is_fully_annotated(node):
-        if node.name == "__init__":
-            return all(arg.annotation for arg in node.args.args if arg.arg != "self")
-        return node.returns is not None and all(arg.annotation for arg in node.args.args if arg.arg != "self")
+def unannotated_functions(definitions):
+    """Functions and methods missing type annotations; __init__ does not need a return annotation."""
+    def is_fully_annotated(definition):
+        if definition["Name"] == "__init__":
+            return definition["Args Annotated"]
+        return definition["Returns Annotated"] and definition["Args Annotated"]
 
-    missing_annotations = [
-        node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef) and not is_fully_annotated(node)
-    ]
+    return [d for d in definitions if d["Kind"] == "function" and not is_fully_annotated(d)]
+
+
+def check_type_annotations(definitions):
+    """Check if all functions and methods use type annotations."""
+    missing_annotations = [d["Name"] for d in unannotated_functions(definitions)]
 
     return "All functions and methods use type annotations." if not missing_annotations else \
         f"Functions without type annotations: {', '.join(missing_annotations)}"
 
 
-def analyze_file(file_content):
+def collect_findings(analysis):
+    """List every issue with its line, for the JSON Lines and SARIF reports."""
+    definitions = analysis["Definitions"]
+    findings = naming_findings(analysis["Naming Issues"]) + analysis["Rule Findings"]
+    findings.extend(
+        {"Rule": "missing-docstring", "Line": d["Line"], "Message": f"{label} has no docstring."}
+        for label, d in documented_definitions(definitions) if not d["Docstring"]
+    )
+    findings.extend(
+        {"Rule": "missing-annotations", "Line": d["Line"], "Message": f"Function {d['Name']} is missing type annotations."}
+        for d in unannotated_functions(definitions)
+    )
+    return sorted(findings, key=lambda finding: finding["Line"])
+
+
+def analyze_file(file_content, rules=None, checks=()):
     """Perform analysis on the given file content."""
-    tree = parse_ast(file_content)
-    total_lines = count_lines(file_content)
-    imports = extract_imports(tree)
-    classes, functions = extract_classes_and_functions(tree)
-    incorrect_classes, incorrect_functions = check_name_conventions(file_content)
-    docstrings = extract_docstrings(tree)
-    type_annotation_report = check_type_annotations(tree)
+    return build_report(analyze_source(file_content, rules, checks))
+
+
+def build_report(analysis):
+    """Turn the engine's analysis of a file into this checker's report."""
+    definitions = analysis["Definitions"]
+    with phase("docstrings"):
+        docstrings = extract_docstrings(definitions)
+    with phase("type annotations"):
+        type_annotations = check_type_annotations(definitions)
+    with phase("findings"):
+        findings = collect_findings(analysis)
 
     return {
-        "Total Lines": total_lines,
-        "Imports": imports,
-        "Classes": classes,
-        "Functions": functions,
-        "Incorrect Classes": incorrect_classes,
-        "Incorrect Functions": incorrect_functions,
+        "Total Lines": analysis["Total Lines"],
+        "Imports": analysis["Imports"],
+        "Classes": analysis["Classes"],
+        "Functions": analysis["Functions"],
+        "Incorrect Classes": analysis["Incorrect Classes"],
+        "Incorrect Functions": analysis["Incorrect Functions"],
+        "Incorrect Variables": analysis["Incorrect Variables"],
+        "Incorrect Constants": analysis["Incorrect Constants"],
         "Docstrings": docstrings,
-        "Type Annotations": type_annotation_report,
+        "Type Annotations": type_annotations,
+        "Rule Findings": analysis["Rule Findings"],
+        "Findings": findings,
     }
 
 
-def write_report(filename, report):
-    """Write the analysis report to a file."""
+def analyze_path(filename, rules=None, checks=(), low_memory=False, docstring_preview=DEFAULT_DOCSTRING_PREVIEW):
+    """Read and analyze one file, recording the error instead of raising if it cannot be parsed."""
+    try:
+        if low_memory:
+            reset_peak_rss()
+            with open(filename, 'rb') as file:
+                report = build_report(analyze_file_low_memory(file, rules, checks, docstring_preview))
+            report["Peak RSS MB"] = peak_rss_mb()
+            return report
+
+        with phase("read"), open(filename, 'r') as file:
+            file_content = file.read()
+        return analyze_file(file_content, rules, checks)
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as error:
+        return {"Error": f"{type(error).__name__}: {error}"}
+
+
+def format_report(report):
+    """Build the lines of the analysis report."""
     report_lines = [
         "Python File Analysis Report",
         "===========================",
@@ -147,15 +146,45 @@ def write_report(filename, report):
     else:
         report_lines.append("All function names follow the snake_case convention.")
 
+    # Variable and constant rules are opt-in, so these sections only appear when something was found
+    if report['Incorrect Variables']:
+        report_lines.append("Incorrect Variable Names:")
+        report_lines.extend(f"- {name}" for name in report['Incorrect Variables'])
+
+    if report['Incorrect Constants']:
+        report_lines.append("Incorrect Module-level Names:")
+        report_lines.extend(f"- {name}" for name in report['Incorrect Constants'])
+
     report_lines.append("Type Annotation Check:")
     report_lines.append("===========================")
     report_lines.append(report['Type Annotations'])
 
+    if report['Rule Findings']:
+        report_lines.append("Additional Rule Findings:")
+        report_lines.append("===========================")
+        report_lines.extend(f"- line {f['Line']}: {f['Message']} [{f['Rule']}]" for f in report['Rule Findings'])
+    return report_lines
+
+
+def write_report(filename, report):
+    """Write the analysis report to a file."""
     with open(f"style_report_{filename}.txt", 'w') as txt:
-        txt.write('\n'.join(report_lines))
+        txt.write('\n'.join(format_report(report)))
+
+
+def write_text_report(txt, report):
+    """Write the report of one file into the combined text report."""
+    txt.write('\n'.join(format_report(report)) + '\n')
+    if report.get("Peak RSS MB") is not None:
+        txt.write(f"Peak memory while analyzing: {report['Peak RSS MB']:.1f} MB\n")
+
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_batch(argv, analyze_path, write_text_report, "functional_style_checker", CACHE_NAMESPACE,
+                           "Functional Python style checker"))
 
-def main():
     filename = input("Please enter the Python file name (must include .py extension): ").strip()
     while not filename.endswith('.py'):
         print("Must include .py extension.")
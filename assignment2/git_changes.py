@@ -0,0 +1,142 @@
+import os
+import re
+import subprocess
+
+# "@@ -12,3 +14,5 @@": the new side starts at line 14 and spans 5 lines (1 when the count is left out)
+HUNK_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+# Escapes git uses in the quoted file names of a patch, besides three octal digits for a byte
+QUOTED_ESCAPES = {'a': 7, 'b': 8, 't': 9, 'n': 10, 'v': 11, 'f': 12, 'r': 13, '"': 34, '\\': 92}
+
+
+class GitError(Exception):
+    """git is missing or refused the command."""
+
+
+def _git(*args):
+    try:
+        completed = subprocess.run(['git', '-c', 'core.quotepath=off', *args],
+                                   capture_output=True, text=True, check=False)
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    if completed.returncode != 0:
+        raise GitError(completed.stderr.strip() or f"git {' '.join(args)} failed")
+    return completed.stdout
+
+
+def _diff_arguments(revision_range, staged):
+    """git diff arguments selecting the changes: staged changes, or a range such as main...HEAD or HEAD~3."""
+    return ['--cached'] if staged else [revision_range]
+
+
+def changed_python_files(revision_range=None, staged=False, paths=()):
+    """Python files added, copied, modified or renamed by the changes, sorted, relative to the current directory.
+
+    The files are read from the working tree, so a range should end at the checked-out commit
+    (HEAD~3..HEAD, main...HEAD, or a single revision to compare against the working tree), and
+    staged files must not have unstaged changes on top, which would move the staged lines.
+    paths optionally limits the files to these git pathspecs.
+    """
+    top_level = _git('rev-parse', '--show-toplevel').strip()
+    output = _git('diff', '--name-only', '--diff-filter=ACMR', '-z',
+                  *_diff_arguments(revision_range, staged), '--', *paths)
+    names = [name for name in output.split('\0') if name.endswith('.py')]
+    if staged and names:
+        unstaged = set(_git('diff', '--name-only', '-z', '--', *paths).split('\0'))
+        modified = [name for name in names if name in unstaged]
+        if modified:
+            raise GitError(f"{', '.join(modified)} also ha{'s' if len(modified) == 1 else 've'} unstaged changes; "
+                           "stage or stash them (git stash --keep-index) before checking with --staged")
+    files = []
+    for name in names:
+        path = os.path.join(top_level, name)
+        if os.path.isfile(path):
+            files.append(os.path.relpath(path))
+    return sorted(files)
+
+
+def _patch_path(name):
+    """The file name of a ---/+++ line of a patch, undoing git's quoting.
+
+    git ends a name that holds a space with a tab, and writes one holding a quote, a backslash
+    or a control character in double quotes with C escapes.
+    """
+    if not name.startswith('"'):
+        return name[:-1] if name.endswith('\t') else name
+    raw = bytearray()
+    position = 1
+    while name[position] != '"':
+        if name[position] != '\\':
+            raw += name[position].encode('utf-8')
+            position += 1
+        elif name[position + 1] in QUOTED_ESCAPES:
+            raw.append(QUOTED_ESCAPES[name[position + 1]])
+            position += 2
+        else:
+            raw.append(int(name[position + 1:position + 4], 8))
+            position += 4
+    return raw.decode('utf-8', errors='surrogateescape')
+
+
+def changed_line_ranges(files, revision_range=None, staged=False):
+    """Map each file to the (first, last) line ranges the changes added or modified in it.
+
+    Raises GitError if a file is missing from the patch, rather than reporting it as unchanged.
+    """
+    if not files:
+        return {}
+    top_level = _git('rev-parse', '--show-toplevel').strip()
+    arguments = [*_diff_arguments(revision_range, staged), '--', *files]
+    # Renames, copies and mode changes without an edit have no hunks, and so no +++ line either
+    ranges = {os.path.relpath(os.path.join(top_level, name)): []
+              for name in _git('diff', '--name-only', '--diff-filter=ACMR', '-z', *arguments).split('\0') if name}
+    # Explicit prefixes, whatever diff.noprefix or diff.mnemonicPrefix say
+    output = _git('diff', '--unified=0', '--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/', *arguments)
+
+    current = None
+    for line in output.splitlines():
+        if line.startswith('+++ '):
+            name = _patch_path(line[4:])
+            current = None if name == '/dev/null' else os.path.relpath(os.path.join(top_level, name[2:]))
+            if current is not None and current not in ranges:
+                raise GitError(f"could not match the patch of {name[2:]!r} to a changed file")
+        elif current is not None:
+            match = HUNK_PATTERN.match(line)
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                if count:  # A count of 0 is a pure deletion, which leaves no lines to report on
+                    ranges[current].append((start, start + count - 1))
+    missing = [filename for filename in files if os.path.relpath(filename) not in ranges]
+    if missing:
+        raise GitError(f"no changes found for {', '.join(missing)} in the diff")
+    return ranges
+
+
+def only_changed_lines(results, ranges):
+    """Reduce each result to the findings on changed lines and the changed line ranges themselves.
+
+    The rest of a report (structure, every name and docstring of the file) describes the whole
+    file, so it is left out; the report writers then show only what the changes touched.
+    """
+    for filename, result in results:
+        if "Error" not in result:
+            changed = ranges.get(os.path.relpath(filename), [])
+
+            def on_changed_line(finding):
+                return finding["Line"] is not None and any(first <= finding["Line"] <= last for first, last in changed)
+
+            result = {
+                "Changed Lines": changed,
+                "Findings": [finding for finding in result["Findings"] if on_changed_line(finding)],
+            }
+        yield filename, result
+
+
+def add_git_arguments(parser):
+    """Register the git options shared by both checkers' batch mode."""
+    parser.add_argument('--git', metavar='RANGE',
+                        help="check only Python files changed in this git range (for example main...HEAD or HEAD~1)")
+    parser.add_argument('--staged', action='store_true', help="check only Python files with staged changes")
+    parser.add_argument('--changed-lines-only', action='store_true',
+                        help="with --git or --staged, report only the findings on changed lines, "
+                             "leaving out the whole-file sections")
+    return parser
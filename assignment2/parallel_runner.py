@@ -0,0 +1,60 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+
+
+def collect_files(targets):
+    """Expand files, directories and glob patterns into a sorted list of unique .py files."""
+    files = set()
+    for target in targets:
+        if any(char in target for char in '*?['):
+            matches = glob.glob(target, recursive=True)
+        elif os.path.exists(target):
+            matches = [target]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {target}")
+
+        for match in matches:
+            if os.path.isdir(match):
+                for root, dirs, names in os.walk(match):
+                    # Skip hidden directories (.git, .venv, ...) and bytecode caches
+                    dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+                    files.update(os.path.normpath(os.path.join(root, name)) for name in names if name.endswith('.py'))
+            elif match.endswith('.py'):
+                files.add(os.path.normpath(match))
+
+    # Sorting keeps the combined report identical from run to run
+    return sorted(files)
+
+
+def default_chunk_size(file_count, workers):
+    """Give each worker about four chunks so slow files do not leave the others idle."""
+    return max(1, file_count // (workers * 4))
+
+
+def run_parallel(analyze, files, workers=None, chunk_size=None):
+    """Apply analyze to every file across a process pool, yielding (filename, result) in input order.
+
+    analyze must be a module-level function so it can be sent to the worker processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) <= 1:
+        # Not worth starting a pool for a single worker or a single file
+        yield from zip(files, map(analyze, files))
+        return
+
+    chunk_size = chunk_size or default_chunk_size(len(files), workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(files, executor.map(analyze, files, chunksize=chunk_size))
+
+
+def add_batch_arguments(parser):
+    """Register the options shared by both checkers' batch mode."""
+    parser.add_argument('paths', nargs='*', help="Python files, directories or glob patterns to check")
+    parser.add_argument('-o', '--output', default='style_report.txt',
+                        help="combined report file, or - for standard output (default: style_report.txt)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="files handed to a worker at a time (default: chosen from the file count)")
+    return parser
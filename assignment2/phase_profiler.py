@@ -0,0 +1,125 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# The profiler of the file being analyzed in this process, or None when profiling is off
+ACTIVE = None
+
+
+class Profiler:
+    """Wall time of each analysis phase and plugin rule.
+
+    events are the timed phases shown in the Chrome trace; totals aggregate count, total
+    and maximum seconds per phase or rule for the summary table.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.events = []
+        self.totals = {}
+
+    def record(self, name, category, start, duration):
+        self.events.append({
+            "Name": name, "Category": category, "Start": start, "Duration": duration,
+            "File": self.filename, "Pid": os.getpid(),
+        })
+        self.add_total(name, duration)
+
+    def add_total(self, name, seconds, count=1, longest=None):
+        totals = self.totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += count
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds if longest is None else longest)
+
+    def merge(self, data):
+        """Add the events and totals exported by another profiler, usually one in a worker process."""
+        events, totals = data
+        self.events.extend(events)
+        for name, (count, seconds, longest) in totals.items():
+            self.add_total(name, seconds, count, longest)
+
+    def export(self):
+        return self.events, self.totals
+
+    def summary(self, slowest=10):
+        """Lines of a table of every phase and rule, followed by the slowest files."""
+        lines = [f"{'Phase / rule':<32} {'Calls':>8} {'Total (s)':>10} {'Mean (ms)':>10} {'Max (ms)':>10}"]
+        for name, (count, seconds, longest) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<32} {count:>8} {seconds:>10.3f} {seconds / count * 1000:>10.3f} {longest * 1000:>10.3f}")
+
+        parse_times = {e["File"]: e["Duration"] for e in self.events if e["Name"] == "parse"}
+        files = sorted((e for e in self.events if e["Name"] == "analyze file"), key=lambda e: -e["Duration"])
+        if files:
+            lines.append("")
+            lines.append("Slowest files (total / parse, ms):")
+            for event in files[:slowest]:
+                parse = parse_times.get(event["File"], 0.0)
+                lines.append(f"{event['Duration'] * 1000:>10.3f} {parse * 1000:>10.3f}  {event['File']}")
+        return lines
+
+    def write_chrome_trace(self, path):
+        """Write the events in the Chrome trace format, viewable in chrome://tracing or Perfetto."""
+        trace = [
+            {"name": e["Name"], "cat": e["Category"], "ph": "X", "ts": e["Start"] * 1e6, "dur": e["Duration"] * 1e6,
+             "pid": e["Pid"], "tid": e["Pid"], "args": {"file": e["File"]}}
+            for e in self.events
+        ]
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+
+
+@contextmanager
+def phase(name, category="phase"):
+    """Time the enclosed block as a phase of the file being analyzed; does nothing when profiling is off."""
+    profiler = ACTIVE
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(name, category, start, time.perf_counter() - start)
+
+
+class ProfiledAnalysis:
+    """Wrap a per-file analyze function so each call is profiled; calls return (result, exported profile).
+
+    A class rather than a closure so it can be sent to worker processes.
+    """
+
+    def __init__(self, analyze):
+        self.analyze = analyze
+
+    def __call__(self, filename):
+        global ACTIVE
+        ACTIVE = Profiler(filename)
+        try:
+            with phase("analyze file", "file"):
+                result = self.analyze(filename)
+            return result, ACTIVE.export()
+        finally:
+            ACTIVE = None
+
+
+def collect_profiles(results, profiler):
+    """Unwrap (filename, (result, profile)) pairs into (filename, result), merging each profile into profiler.
+
+    The time the consumer takes between two results, usually spent writing the report, is recorded too.
+    """
+    for filename, (result, profile) in results:
+        profiler.merge(profile)
+        start = time.perf_counter()
+        yield filename, result
+        profiler.filename = filename
+        profiler.record("write report", "report", start, time.perf_counter() - start)
+
+
+def add_profile_arguments(parser):
+    """Register the profiling options shared by both checkers' batch mode."""
+    parser.add_argument('--profile', action='store_true',
+                        help="time every phase and rule and print a summary to standard error (disables the cache)")
+    parser.add_argument('--profile-trace', metavar='PATH',
+                        help="also write the timings as a Chrome trace JSON file (implies --profile)")
+    return parser
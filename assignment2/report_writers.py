@@ -0,0 +1,181 @@
+import sys
+import json
+from contextlib import contextmanager
+
+from rule_plugins import REGISTRY
+
+REPORT_FORMATS = ('text', 'jsonl', 'sarif')
+
+# Rules a finding can refer to, with the level SARIF consumers show them at
+RULES = {
+    "parse-error": ("error", "The file could not be read or parsed."),
+    "naming-class": ("warning", "Class names should follow the class naming rule (CamelCase by default)."),
+    "naming-function": ("warning", "Function names should follow the function naming rule (snake_case by default)."),
+    "naming-variable": ("warning", "Variables assigned in functions should follow the variable naming rule."),
+    "naming-constant": ("warning", "Names assigned at module level should follow the constant naming rule."),
+    "missing-docstring": ("note", "Classes and functions should have a docstring."),
+    "missing-annotations": ("note", "Functions should annotate their arguments and return type."),
+}
+
+
+def rule_metadata():
+    """The built-in rules plus every registered plugin rule, as rule id -> (level, description)."""
+    metadata = dict(RULES)
+    metadata.update((rule_id, (rule.level, rule.description)) for rule_id, rule in REGISTRY.items())
+    return metadata
+
+
+def naming_findings(naming_issues):
+    """Turn the engine's naming issues into findings."""
+    return [
+        {"Rule": f"naming-{issue['Kind']}", "Line": issue["Line"],
+         "Message": f"{issue['Kind'].capitalize()} name '{issue['Name']}' does not follow the naming convention."}
+        for issue in naming_issues
+    ]
+
+
+class ReportWriter:
+    """Write per-file results to a stream as they arrive, so nothing but the current result is held in memory.
+
+    A result containing an "Error" key is a file that could not be analyzed.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.checked = 0
+        self.failed = 0
+
+    def write(self, filename, result):
+        self.checked += 1
+        if "Error" in result:
+            self.failed += 1
+            self._write_error(filename, result["Error"])
+        else:
+            self._write_result(filename, result)
+        self.stream.flush()  # Let readers of the stream see each file as soon as it is done
+
+    def close(self):
+        """Finish the report; the stream itself is left open."""
+
+    def _write_error(self, filename, error):
+        raise NotImplementedError
+
+    def _write_result(self, filename, result):
+        raise NotImplementedError
+
+
+class TextReportWriter(ReportWriter):
+    """The human-readable combined report. write_text(stream, result) writes the body for one file."""
+
+    def __init__(self, stream, write_text):
+        super().__init__(stream)
+        self.write_text = write_text
+
+    def _write_error(self, filename, error):
+        self.stream.write(f"File: {filename}\nCould not analyze this file: {error}\n\n")
+
+    def _write_result(self, filename, result):
+        self.stream.write(f"File: {filename}\n")
+        if "Changed Lines" not in result:
+            self.write_text(self.stream, result)
+        else:  # Only checking changed lines: list what was found on them
+            self.stream.write("Findings on changed lines:\n")
+            self.stream.write("===========================\n")
+            for finding in result["Findings"]:
+                self.stream.write(f"- line {finding['Line']}: {finding['Message']} [{finding['Rule']}]\n")
+            if not result["Findings"]:
+                self.stream.write("None\n")
+        self.stream.write('\n')
+
+    def close(self):
+        self.stream.write(f"Files checked: {self.checked}\n")
+        self.stream.write(f"Files that could not be analyzed: {self.failed}\n")
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """One JSON object per file: {"File": ..., "Report": ...} or {"File": ..., "Error": ...}."""
+
+    def _write_error(self, filename, error):
+        self.stream.write(json.dumps({"File": filename, "Error": error}) + '\n')
+
+    def _write_result(self, filename, result):
+        self.stream.write(json.dumps({"File": filename, "Report": result}) + '\n')
+
+
+class SarifReportWriter(ReportWriter):
+    """A SARIF 2.1.0 log with one result per finding, written incrementally between a fixed header and footer."""
+
+    def __init__(self, stream, tool_name):
+        super().__init__(stream)
+        self._first_result = True
+        self.rules = rule_metadata()
+        driver = {
+            "name": tool_name,
+            "rules": [
+                {"id": rule_id, "shortDescription": {"text": text}, "defaultConfiguration": {"level": level}}
+                for rule_id, (level, text) in self.rules.items()
+            ],
+        }
+        # Everything up to the open results array; results are appended as files finish
+        header = json.dumps({
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [{"tool": {"driver": driver}, "results": []}],
+        })
+        self.stream.write(header[:-len(']}]}')])
+
+    def _write_error(self, filename, error):
+        self._write_finding(filename, {"Rule": "parse-error", "Line": None, "Message": error})
+
+    def _write_result(self, filename, result):
+        for finding in result["Findings"]:
+            self._write_finding(filename, finding)
+
+    def _write_finding(self, filename, finding):
+        location = {"artifactLocation": {"uri": filename.replace('\\', '/')}}
+        if finding["Line"]:
+            location["region"] = {"startLine": finding["Line"]}
+        sarif_result = {
+            "ruleId": finding["Rule"],
+            "level": self.rules[finding["Rule"]][0],
+            "message": {"text": finding["Message"]},
+            "locations": [{"physicalLocation": location}],
+        }
+        self.stream.write(('' if self._first_result else ',') + json.dumps(sarif_result))
+        self._first_result = False
+
+    def close(self):
+        self.stream.write(']}]}\n')
+
+
+@contextmanager
+def open_output(output):
+    """Open the report file, or use standard output when output is '-'."""
+    if output == '-':
+        yield sys.stdout
+    else:
+        with open(output, 'w') as stream:
+            yield stream
+
+
+def write_reports(output, results, report_format, write_text, tool_name):
+    """Stream (filename, result) pairs into one report in the chosen format. Returns the number of failed files."""
+    with open_output(output) as stream:
+        if report_format == 'jsonl':
+            writer = JsonLinesReportWriter(stream)
+        elif report_format == 'sarif':
+            writer = SarifReportWriter(stream, tool_name)
+        else:
+            writer = TextReportWriter(stream, write_text)
+
+        for filename, result in results:
+            writer.write(filename, result)
+        writer.close()
+    return writer.failed
+
+
+def add_report_arguments(parser):
+    """Register the report format option shared by both checkers' batch mode."""
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='text',
+                        help="report format (default: text); use -o - to stream it to standard output")
+    return parser
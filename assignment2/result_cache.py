@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+from parallel_runner import run_parallel
+
+DEFAULT_CACHE_PATH = '.style_checker_cache.sqlite'
+DEFAULT_MAX_ENTRIES = 100_000
+HASH_CHUNK_BYTES = 1 << 20  # Read at a time when hashing, so no file is held in memory whole
+
+
+class ResultCache:
+    """Persistent store of analysis results keyed on file content, evicted least-recently-used first.
+
+    namespace should name the checker and its output version, so a checker whose
+    analysis changes never reuses results produced by an older version.
+    """
+
+    def __init__(self, path, namespace, max_entries=DEFAULT_MAX_ENTRIES):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, report TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+
+    def key_for(self, filename):
+        """Hash the raw bytes of a file together with the namespace."""
+        digest = hashlib.sha256(self.namespace.encode())
+        digest.update(b'\0')
+        return _hash_file(filename, digest).hexdigest()
+
+    def get(self, key):
+        """Return the cached result for key, or None if there is none."""
+        row = self._connection.execute("SELECT report FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO results (key, report, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(result), time.time())
+        )
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries."""
+        self._connection.execute(
+            "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+
+    def close(self):
+        self.evict()
+        self._connection.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _hash_file(filename, digest):
+    """Feed the bytes of a file to a hashlib digest a chunk at a time and return the digest."""
+    with open(filename, 'rb') as file:
+        while True:
+            chunk = file.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                return digest
+            digest.update(chunk)
+
+
+def _fingerprint(filename):
+    """Size and modification time, used to notice a file that changed while it was being analyzed."""
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def run_cached(analyze, files, cache, workers=None, chunk_size=None):
+    """Like run_parallel, but only files whose content is not in the cache are analyzed.
+
+    Results still come out in input order; new results are added to the cache.
+    """
+    keys = {}
+    fingerprints = {}
+    cached = {}
+    for filename in files:
+        try:
+            fingerprints[filename] = _fingerprint(filename)
+            keys[filename] = cache.key_for(filename)
+        except OSError:
+            continue  # Left to analyze, which reports the error
+        result = cache.get(keys[filename])
+        if result is not None:
+            cached[filename] = result
+
+    misses = [filename for filename in files if filename not in cached]
+    fresh = run_parallel(analyze, misses, workers=workers, chunk_size=chunk_size)
+
+    for filename in files:
+        if filename in cached:
+            yield filename, cached[filename]
+            continue
+
+        _, result = next(fresh)
+        if filename in keys:
+            try:
+                unchanged = _fingerprint(filename) == fingerprints[filename]
+            except OSError:
+                unchanged = False
+            if unchanged:
+                cache.put(keys[filename], result)
+        yield filename, result
+
+
+def add_cache_arguments(parser):
+    """Register the cache options shared by both checkers' batch mode."""
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help=f"result cache database (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--no-cache', action='store_true', help="analyze every file, ignoring the cache")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"maximum number of cached results (default: {DEFAULT_MAX_ENTRIES})")
+    return parser
@@ -0,0 +1,97 @@
+import ast
+import importlib
+
+# Every known rule class by rule id; plugin modules add to it with @register when imported
+REGISTRY = {}
+
+
+def register(rule_class):
+    """Class decorator that makes a Rule subclass available by its rule_id."""
+    if rule_class.rule_id in REGISTRY:
+        raise ValueError(f"Rule {rule_class.rule_id!r} is already registered")
+    REGISTRY[rule_class.rule_id] = rule_class
+    return rule_class
+
+
+class Rule:
+    """Base class for plugin rules.
+
+    A rule lists the AST node types it wants in node_types. During the analyzer's single
+    walk over the tree, check is called for every node of those types and yields findings.
+    Bump version when a rule starts reporting differently, so cached results are not reused.
+    """
+    rule_id = None
+    description = ""
+    level = "warning"  # SARIF level: error, warning or note
+    node_types = ()
+    version = 1
+
+    def check(self, node, analyzer):
+        """Yield findings for node; analyzer.scope holds the enclosing class and function nodes."""
+        raise NotImplementedError
+
+    def finding(self, node, message):
+        return {"Rule": self.rule_id, "Line": getattr(node, 'lineno', None), "Message": message}
+
+
+@register
+class BareExcept(Rule):
+    rule_id = "bare-except"
+    description = "Use 'except Exception:' rather than a bare 'except:'."
+    node_types = (ast.ExceptHandler,)
+
+    def check(self, node, analyzer):
+        if node.type is None:
+            yield self.finding(node, "Bare 'except:' also catches SystemExit and KeyboardInterrupt.")
+
+
+@register
+class MutableDefaultArgument(Rule):
+    rule_id = "mutable-default-argument"
+    description = "Default argument values should not be mutable lists, dicts or sets."
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+    def check(self, node, analyzer):
+        for default in node.args.defaults + node.args.kw_defaults:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                name = getattr(node, 'name', 'lambda')
+                yield self.finding(default, f"{name} has a mutable default argument, shared between calls.")
+
+
+def load_plugins(modules):
+    """Import plugin modules so their @register-ed rules become available."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def select_rules(rule_ids):
+    """Instantiate the rules with the given ids; 'all' selects every registered rule."""
+    if 'all' in rule_ids:
+        rule_ids = list(REGISTRY)
+    unknown = [rule_id for rule_id in rule_ids if rule_id not in REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown rule {', '.join(unknown)}, expected one of: {', '.join(REGISTRY)}")
+    return [REGISTRY[rule_id]() for rule_id in dict.fromkeys(rule_ids)]
+
+
+def describe_checks(checks):
+    """A stable text form of the enabled rules, used to keep cached results of different rule sets apart."""
+    return ';'.join(sorted(f"{check.rule_id}@{check.version}" for check in checks))
+
+
+def add_rule_arguments(parser):
+    """Register the plugin rule options shared by both checkers' batch mode."""
+    parser.add_argument('--plugin', action='append', default=[], metavar='MODULE',
+                        help="import a module that registers extra rules")
+    parser.add_argument('--rule', action='append', default=[], metavar='RULE_ID',
+                        help="enable a plugin rule, or 'all' for every registered rule")
+    return parser
+
+
+def checks_from_arguments(parser, args):
+    """Load the requested plugins and instantiate the selected rules, reporting mistakes through parser."""
+    try:
+        load_plugins(args.plugin)
+        return select_rules(args.rule)
+    except (ImportError, ValueError) as error:
+        parser.error(str(error))
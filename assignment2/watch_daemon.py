@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import threading
+import socketserver
+
+from parallel_runner import collect_files, run_parallel
+from result_cache import _fingerprint, _hash_file
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class WatchState:
+    """The latest result of every watched file, kept warm in memory.
+
+    A file is analyzed again only when its size or modification time changed and its
+    content hash changed too, so touching a file or saving it unchanged costs one read.
+    """
+
+    def __init__(self, analyze, paths):
+        self.analyze = analyze
+        self.paths = paths
+        self.files = []
+        self.entries = {}  # Absolute path -> [fingerprint, content hash, result]
+        self.analyses = 0
+        self.reused = 0
+
+    def warm_up(self, workers=None):
+        """Analyze every watched file across the process pool.
+
+        Fingerprints and hashes are taken before the analysis, so a file saved while it runs
+        no longer matches them and is analyzed again by the next rescan.
+        """
+        self.files = collect_files(self.paths)
+        before = {}
+        for filename in self.files:
+            try:
+                fingerprint = _fingerprint(filename)
+                before[filename] = fingerprint, _hash_file(filename, hashlib.sha256()).hexdigest()
+            except OSError:
+                pass  # Gone already; the next rescan drops it
+        for filename, result in run_parallel(self.analyze, self.files, workers=workers):
+            if filename in before:
+                self.entries[os.path.abspath(filename)] = [*before[filename], result]
+            self.analyses += 1
+
+    def rescan(self):
+        """Pick up added and removed files and bring every changed one up to date."""
+        try:
+            self.files = collect_files(self.paths)
+        except FileNotFoundError:
+            return  # A watched path is being replaced; try again on the next poll
+        watched = {os.path.abspath(filename) for filename in self.files}
+        for path in list(self.entries):
+            if path not in watched:
+                del self.entries[path]
+        for filename in self.files:
+            self.result(filename)
+
+    def result(self, filename):
+        """The up-to-date result for one file, analyzing it only if its content changed."""
+        path = os.path.abspath(filename)
+        entry = self.entries.get(path)
+        try:
+            fingerprint = _fingerprint(path)
+            if entry is not None and entry[0] == fingerprint:
+                self.reused += 1
+                return entry[2]
+            digest = _hash_file(path, hashlib.sha256()).hexdigest()
+        except OSError as error:
+            self.entries.pop(path, None)
+            return {"Error": f"{type(error).__name__}: {error}"}
+
+        if entry is not None and entry[1] == digest:
+            entry[0] = fingerprint
+            self.reused += 1
+            return entry[2]
+        result = self.analyze(path)
+        self.entries[path] = [fingerprint, digest, result]
+        self.analyses += 1
+        return result
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer each JSON request line on the connection with one JSON response line."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.answer(json.loads(line))
+            except (ValueError, KeyError, TypeError) as error:
+                response = {"Error": f"{type(error).__name__}: {error}"}
+            self.wfile.write((json.dumps(response) + '\n').encode())
+            self.wfile.flush()
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class WatchServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Serve a WatchState on a Unix socket, rescanning the watched files between requests.
+
+        Each connection has its own thread, so a client that keeps its connection open does not
+        hold up others; the state is only touched while holding the lock.
+
+        Requests are JSON objects with a "Command":
+        {"Command": "check", "Files": [...]} returns {"Results": [{"File": ..., "Report" or "Error": ...}]},
+        every watched file when "Files" is left out; {"Command": "status"} returns counters;
+        {"Command": "shutdown"} stops the daemon.
+        """
+
+        # Idle connections must not keep the daemon from exiting
+        daemon_threads = True
+        block_on_close = False
+
+        def __init__(self, socket_path, state, poll_interval=DEFAULT_POLL_INTERVAL):
+            self.state = state
+            self.poll_interval = poll_interval
+            self.started = time.time()
+            self._last_scan = time.monotonic()
+            self.stopping = False
+            self.lock = threading.Lock()
+            super().__init__(socket_path, _RequestHandler)
+            self.timeout = poll_interval  # handle_request returns at least this often
+
+        def service_actions(self):
+            if time.monotonic() - self._last_scan >= self.poll_interval:
+                with self.lock:
+                    self.state.rescan()
+                self._last_scan = time.monotonic()
+
+        def answer(self, request):
+            with self.lock:
+                return self._answer(request)
+
+        def _answer(self, request):
+            command = request["Command"]
+            if command == "check":
+                files = request.get("Files") or self.state.files
+                results = []
+                for filename in files:
+                    result = self.state.result(filename)
+                    if "Error" in result:
+                        results.append({"File": filename, "Error": result["Error"]})
+                    else:
+                        results.append({"File": filename, "Report": result})
+                return {"Results": results}
+            if command == "status":
+                return {
+                    "Files": len(self.state.files),
+                    "Analyses": self.state.analyses,
+                    "Reused": self.state.reused,
+                    "Uptime": time.time() - self.started,
+                }
+            if command == "shutdown":
+                self.stopping = True
+                return {"Stopping": True}
+            raise ValueError(f"unknown command {command!r}")
+
+
+def serve(socket_path, analyze, paths, workers=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Watch the paths and answer queries on socket_path until asked to shut down. Returns the exit status."""
+    if not hasattr(socketserver, 'UnixStreamServer'):
+        print("Watch mode needs Unix domain sockets, which this platform does not have.", file=sys.stderr)
+        return 1
+    if os.path.exists(socket_path):
+        try:
+            query(socket_path, {"Command": "status"})
+        except OSError:
+            os.unlink(socket_path)  # Left behind by a daemon that did not exit cleanly
+        else:
+            print(f"A daemon is already serving {socket_path}.", file=sys.stderr)
+            return 1
+
+    state = WatchState(analyze, paths)
+    state.warm_up(workers)
+    with WatchServer(socket_path, state, poll_interval) as server:
+        print(f"Watching {len(state.files)} files, serving on {socket_path}.", file=sys.stderr)
+        try:
+            # Not serve_forever: a shutdown request arrives on the thread that would have to wait for it
+            while not server.stopping:
+                server.handle_request()
+                server.service_actions()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+    return 0
+
+
+def query(socket_path, request):
+    """Send one request to a running daemon and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + '\n').encode())
+        with client.makefile('rb') as response:
+            return json.loads(response.readline())
+
+
+def add_daemon_arguments(parser):
+    """Register the watch mode options shared by both checkers' batch mode."""
+    parser.add_argument('--serve', metavar='SOCKET',
+                        help="keep running, watching the paths and answering queries on this Unix socket")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"seconds between checks for changed files in watch mode (default: {DEFAULT_POLL_INTERVAL})")
+    return parser
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a style checker started with --serve")
+    parser.add_argument('socket', help="the daemon's Unix socket")
+    parser.add_argument('files', nargs='*', help="files to check (default: every watched file)")
+    parser.add_argument('--status', action='store_true', help="print the daemon's counters instead")
+    parser.add_argument('--shutdown', action='store_true', help="stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.shutdown:
+        request = {"Command": "shutdown"}
+    elif args.status:
+        request = {"Command": "status"}
+    else:
+        request = {"Command": "check", "Files": [os.path.abspath(f) for f in args.files]}
+    try:
+        response = query(args.socket, request)
+    except OSError as error:
+        parser.error(f"cannot reach the daemon: {error}")
+
+    if "Results" in response:
+        # The same JSON Lines as the batch report, one file per line
+        for line in response["Results"]:
+            print(json.dumps(line))
+        return 1 if any("Error" in line for line in response["Results"]) else 0
+    print(json.dumps(response))
+    return 1 if "Error" in response else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import sys
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+CHUNK_BYTES = CHUNK_SIZE // 8
+
+# Byte value -> positions of its set bits, used to list the members of a chunk a byte at a time
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class BitmapSet:
+    """A set of integers stored as one bit per possible value, in chunks of 65536 values.
+
+    As in a roaring bitmap, value >> 16 picks the chunk and the low 16 bits the bit inside it;
+    only chunks holding at least one member are kept. Each chunk is a Python int used as a
+    65536-bit word array, so union, intersection and the differences are a single C-level pass
+    over the machine words of the chunks involved. Meant for dense domains such as ID ranges,
+    where it takes about one bit per possible value instead of some 36 bytes per member of a
+    list of Python ints; a chunk costs 8 KB however few members it has.
+    """
+
+    __slots__ = ('_chunks',)
+
+    def __init__(self, values=()):
+        buffers = {}
+        for value in values:
+            key = value >> CHUNK_BITS
+            buffer = buffers.get(key)
+            if buffer is None:
+                buffer = buffers[key] = bytearray(CHUNK_BYTES)
+            offset = value & CHUNK_MASK
+            buffer[offset >> 3] |= 1 << (offset & 7)
+        self._chunks = {key: int.from_bytes(buffer, 'little') for key, buffer in buffers.items()}
+
+    @classmethod
+    def _from_chunks(cls, chunks):
+        bitmap = cls.__new__(cls)
+        bitmap._chunks = chunks
+        return bitmap
+
+    def __len__(self):
+        return sum(chunk.bit_count() for chunk in self._chunks.values())
+
+    def __contains__(self, value):
+        return self._chunks.get(value >> CHUNK_BITS, 0) >> (value & CHUNK_MASK) & 1 == 1
+
+    def __iter__(self):
+        """Members in ascending order."""
+        for key in sorted(self._chunks):
+            base = key << CHUNK_BITS
+            for index, byte in enumerate(self._chunks[key].to_bytes(CHUNK_BYTES, 'little')):
+                if byte:
+                    start = base + index * 8
+                    for bit in BYTE_BITS[byte]:
+                        yield start + bit
+
+    def __eq__(self, other):
+        if not isinstance(other, BitmapSet):
+            return NotImplemented
+        return self._chunks == other._chunks
+
+    def __repr__(self):
+        return f"BitmapSet({list(self)})" if len(self) <= 20 else f"<BitmapSet of {len(self)} integers>"
+
+    def union(self, other):
+        chunks = dict(self._chunks)
+        for key, chunk in other._chunks.items():
+            chunks[key] = chunks.get(key, 0) | chunk
+        return BitmapSet._from_chunks(chunks)
+
+    def intersection(self, other):
+        smaller, larger = sorted((self._chunks, other._chunks), key=len)
+        chunks = {}
+        for key, chunk in smaller.items():
+            common = chunk & larger.get(key, 0)
+            if common:
+                chunks[key] = common
+        return BitmapSet._from_chunks(chunks)
+
+    def difference(self, other):
+        chunks = {}
+        for key, chunk in self._chunks.items():
+            rest = chunk & ~other._chunks.get(key, 0)
+            if rest:
+                chunks[key] = rest
+        return BitmapSet._from_chunks(chunks)
+
+    def symmetric_difference(self, other):
+        chunks = dict(self._chunks)
+        for key, chunk in other._chunks.items():
+            either = chunks.get(key, 0) ^ chunk
+            if either:
+                chunks[key] = either
+            else:
+                del chunks[key]
+        return BitmapSet._from_chunks(chunks)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+    def nbytes(self):
+        """Approximate memory taken by the set, in bytes."""
+        return sys.getsizeof(self._chunks) + sum(sys.getsizeof(chunk) for chunk in self._chunks.values())
+
+
+def make_set(data):
+    """The distinct integers of data as a BitmapSet; an empty set for None."""
+    return BitmapSet(() if data is None else data)
+
+
+def is_set(data):
+    """True if no integer of data repeats; None is not a set."""
+    if data is None:
+        return False
+    return len(BitmapSet(data)) == len(data)
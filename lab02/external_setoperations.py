@@ -0,0 +1,195 @@
+import os
+import sys
+import heapq
+import argparse
+import tempfile
+from array import array
+from itertools import islice
+
+from setoperations import DEFAULT_CHUNK_BYTES, read_integer_chunks
+
+# A run of this many Python ints takes about 200 MB while it is being sorted
+DEFAULT_RUN_ITEMS = 5_000_000
+# Merge at most this many runs at once, so huge inputs never run out of file handles
+MAX_OPEN_RUNS = 128
+RUN_READ_ITEMS = 1 << 16
+WRITE_BATCH = 1 << 16
+
+# Operation -> (keep values only in the first input, in both, only in the second).
+# Unlike setoperations, an input with repeated values is not an error: it stands for the set of its
+# values, since a stream of many GB cannot be rejected after half of the result has been written.
+OPERATIONS = {
+    "union": (True, True, True),
+    "intersection": (False, True, False),
+    "difference": (True, False, False),
+    "symmetric_difference": (True, False, True),
+}
+
+
+def write_run(values, directory):
+    """Write sorted values as a temporary file of 64-bit integers and return its path."""
+    descriptor, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(descriptor, 'wb') as file:
+        values = iter(values)
+        while True:
+            batch = array('q', islice(values, RUN_READ_ITEMS))
+            if not batch:
+                break
+            batch.tofile(file)
+    return path
+
+
+def read_run(path):
+    """Yield the values of a run file, a block at a time."""
+    with open(path, 'rb') as file:
+        while True:
+            block = array('q')
+            try:
+                block.fromfile(file, RUN_READ_ITEMS)
+            except EOFError:
+                pass  # The last block is short; fromfile keeps what it read
+            if not block:
+                return
+            yield from block
+
+
+def write_sorted_runs(chunks, directory, run_items=DEFAULT_RUN_ITEMS):
+    """Sort the integers in runs of at most run_items, each written to its own file. Returns the paths."""
+    runs = []
+    buffer = []
+    for chunk in chunks:
+        buffer.extend(chunk)
+        if len(buffer) >= run_items:
+            buffer.sort()
+            runs.append(write_run(buffer, directory))
+            buffer = []
+    if buffer or not runs:
+        buffer.sort()
+        runs.append(write_run(buffer, directory))
+    return runs
+
+
+def merge_runs(runs, directory):
+    """One sorted stream of every value in the runs, merging in several passes if there are many runs."""
+    while len(runs) > MAX_OPEN_RUNS:
+        group, runs = runs[:MAX_OPEN_RUNS], runs[MAX_OPEN_RUNS:]
+        runs.append(write_run(heapq.merge(*map(read_run, group)), directory))
+        for path in group:
+            os.remove(path)
+    return heapq.merge(*map(read_run, runs))
+
+
+def external_sort(file, directory, run_items=DEFAULT_RUN_ITEMS, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Sorted stream of the integers in file, keeping at most run_items of them in memory.
+
+    The file is read a block at a time and cut into runs that are sorted in memory and written to
+    directory; the returned stream merges the runs back together.
+    """
+    return merge_runs(write_sorted_runs(read_integer_chunks(file, chunk_bytes), directory, run_items), directory)
+
+
+def distinct(values):
+    """Drop repeats from a sorted stream."""
+    previous = object()
+    for value in values:
+        if value != previous:
+            yield value
+            previous = value
+
+
+def has_repeats(values):
+    """True if a sorted stream has two equal neighbours."""
+    previous = object()
+    for value in values:
+        if value == previous:
+            return True
+        previous = value
+    return False
+
+
+def merge_join(first, second, left, both, right):
+    """Walk two sorted distinct streams together in one pass.
+
+    Yields the values only in first if left, the values in both if both, and the values only in second if right.
+    """
+    end = object()
+    first, second = iter(first), iter(second)
+    a, b = next(first, end), next(second, end)
+    while a is not end and b is not end:
+        if a < b:
+            if left:
+                yield a
+            a = next(first, end)
+        elif b < a:
+            if right:
+                yield b
+            b = next(second, end)
+        else:
+            if both:
+                yield a
+            a, b = next(first, end), next(second, end)
+    if left and a is not end:
+        yield a
+        yield from first
+    if right and b is not end:
+        yield b
+        yield from second
+
+
+def write_values(values, stream):
+    """Write one value per line, formatting a batch at a time."""
+    values = iter(values)
+    while True:
+        batch = list(islice(values, WRITE_BATCH))
+        if not batch:
+            break
+        stream.write('\n'.join(map(str, batch)) + '\n')
+
+
+def _open_input(path):
+    return open(sys.stdin.fileno(), 'rb', closefd=False) if path == '-' else open(path, 'rb')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Set operations over integer files larger than memory")
+    parser.add_argument('operation', choices=['make_set', 'is_set', *OPERATIONS])
+    parser.add_argument('inputs', nargs='+',
+                        help="files of integers separated by commas or whitespace, - for standard input")
+    parser.add_argument('-o', '--output', default='-', help="result file, one value per line (default: standard output)")
+    parser.add_argument('--run-items', type=int, default=DEFAULT_RUN_ITEMS,
+                        help=f"integers sorted in memory at a time (default: {DEFAULT_RUN_ITEMS})")
+    parser.add_argument('--temp-dir', help="where the sorted runs are kept (default: the system temporary directory)")
+    args = parser.parse_args(argv)
+    expected = 2 if args.operation in OPERATIONS else 1
+    if len(args.inputs) != expected:
+        parser.error(f"{args.operation} takes {expected} input{'s' if expected > 1 else ''}")
+
+    try:
+        with tempfile.TemporaryDirectory(dir=args.temp_dir) as directory:
+            streams = []
+            for path in args.inputs:
+                with _open_input(path) as file:
+                    # The runs are written before this returns, so only the merge is left lazy
+                    streams.append(external_sort(file, directory, args.run_items))
+
+            if args.operation == 'is_set':
+                print(not has_repeats(streams[0]))
+                return 0
+            if args.operation == 'make_set':
+                result = distinct(streams[0])
+            else:
+                result = merge_join(distinct(streams[0]), distinct(streams[1]), *OPERATIONS[args.operation])
+
+            if args.output == '-':
+                write_values(result, sys.stdout)
+            else:
+                with open(args.output, 'w') as output:
+                    write_values(result, output)
+    except (OSError, ValueError, OverflowError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
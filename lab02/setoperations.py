@@ -1,102 +1,190 @@
-def make_set(data):
-    if data == None:
-        empty = []
-        print(empty)
-    else:
-        data.sort()
-        # print(data)
-        result = []
-        for item in data:
-            if item not in result:
-                result.append(item)
-        print(result)
+from array import array
 
+try:
+    import numpy
+except ImportError:  # Everything falls back to the pure-Python implementation
+    numpy = None
 
-def is_set(data):
 
-    if data == None:
-        print("False")
+def _uses_numpy(*inputs):
+    """True when NumPy is installed and an input is a NumPy array; such calls take the vectorized path."""
+    return numpy is not None and any(isinstance(data, numpy.ndarray) for data in inputs)
 
-    else:
-        data.sort()
-        if not data:
-            print("True")
-
-        else:
-            cur_val = data[0]
-            for i in range(1, len(data)):
-                if data[i] == cur_val:
-                    print("False")
-                    break
-                else:
-                    cur_val = data[i]
-            else:
-                print("True")
+
+def _as_array(data):
+    """data as a NumPy integer array; None is the empty array."""
+    if isinstance(data, numpy.ndarray):
+        return data
+    return numpy.array(() if data is None else data, dtype=numpy.int64)
+
+
+def _sorted_unique(array):
+    """Sorted distinct values of array: one sort, then keep each value that differs from its neighbour.
+
+    Faster than numpy.unique, which on recent NumPy versions hashes before it sorts.
+    """
+    ordered = numpy.sort(array)
+    keep = numpy.empty(len(ordered), dtype=bool)
+    keep[:1] = True
+    numpy.not_equal(ordered[1:], ordered[:-1], out=keep[1:])
+    return ordered[keep]
+
+
+def _array_is_set(array):
+    """True if no value repeats: after sorting, no two neighbours are equal."""
+    ordered = numpy.sort(array)
+    return not numpy.any(ordered[1:] == ordered[:-1])
+
+
+def _distinct(data):
+    """The items of data as a Python set, or None if an item repeats; None counts as the empty set."""
+    if data is None:
+        return set()
+    items = set(data)
+    return items if len(items) == len(data) else None
+
+
+def make_set(data):
+    """Sorted list of the distinct items in data; an empty list for None."""
+    if data is None:
+        return []
+    if _uses_numpy(data):
+        return _sorted_unique(data)
+    return sorted(set(data))
+
+
+def is_set(data):
+    """True if no item of data repeats; None is not a set."""
+    if data is None:
+        return False
+    if _uses_numpy(data):
+        return bool(_array_is_set(data))
+    return len(set(data)) == len(data)
+
+
+def _set_operation(setA, setB, operation, array_operation):
+    """Apply operation to both inputs as hash sets and return the sorted result.
+
+    Like the operations on sets it stands for, the result is empty when either input repeats an item.
+    Each input is hashed once and the output sorted once, so this runs in O(n log n) whatever the overlap.
+    If either input is a NumPy array, array_operation(first, second) runs on both as sorted integer
+    arrays instead and the result is an array too.
+    """
+    if _uses_numpy(setA, setB):
+        first = _as_array(setA)
+        second = _as_array(setB)
+        if not _array_is_set(first) or not _array_is_set(second):
+            return first[:0]
+        return array_operation(first, second)
+
+    first = _distinct(setA)
+    second = _distinct(setB)
+    if first is None or second is None:
+        return []
+    return sorted(operation(first, second))
 
 
 def union(setA, setB):
-    def is_set(data):
-        if not data:
-            return ("Zero")
-        else:
-            data.sort()
-            cur_val = data[0]
-            for i in range(1, len(data)):
-                if data[i] == cur_val:
-                    return ("False")
-                else:
-                    cur_val = data[i]
-            else:
-                return ("True")
-
-    first = is_set(setA)
-    second = is_set(setB)
-    if first == "False" or second == "False":
-        empty = []
-        print(empty)
-    elif first == "True" and second == "True":
-        result = []
-        result += setA
-        for item in setB:
-            if item not in result:
-                result.append(item)
-        print(result)
-    elif first == "Zero" and second == "True":
-        print(setB)
-    elif first == "True" and second == "Zero":
-        print(setA)
+    """Sorted items in either set."""
+    return _set_operation(setA, setB, set.union, lambda first, second: _sorted_unique(numpy.concatenate((first, second))))
 
 
 def intersection(setA, setB):
-    if not setA or not setB:
-        empty = []
-        print(empty)
+    """Sorted items in both sets."""
+    return _set_operation(setA, setB, set.intersection,
+                          lambda first, second: numpy.intersect1d(first, second, assume_unique=True))
+
+
+def difference(setA, setB):
+    """Sorted items of setA that are not in setB."""
+    # setdiff1d keeps the order of its first input, so its result still needs sorting
+    return _set_operation(setA, setB, set.difference,
+                          lambda first, second: numpy.sort(numpy.setdiff1d(first, second, assume_unique=True)))
+
+
+def symmetric_difference(setA, setB):
+    """Sorted items in exactly one of the sets."""
+    return _set_operation(setA, setB, set.symmetric_difference,
+                          lambda first, second: numpy.setxor1d(first, second, assume_unique=True))
+
+
+COMMAS_TO_SPACES = bytes.maketrans(b',', b' ')
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+
+def _to_integers(fields):
+    try:
+        return list(map(int, fields))
+    except ValueError:
+        pass
+    for field in fields:  # Only to name the field that failed
+        try:
+            int(field)
+        except ValueError:
+            raise ValueError(f"Not an integer: {field.decode(errors='replace')!r}") from None
+
+
+def read_integer_chunks(file, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Yield lists of the integers in a file of numbers separated by commas or whitespace, a block at a time.
+
+    Empty fields, as in "1,,2" or a trailing comma, are skipped; anything else that is not an integer
+    raises ValueError.
+    """
+    rest = b''
+    while True:
+        block = file.read(chunk_bytes)
+        if not block:
+            break
+        if isinstance(block, str):
+            block = block.encode()
+        block = rest + block.translate(COMMAS_TO_SPACES)
+        fields = block.split()
+        # Unless the block ends on a separator, its last number may continue in the next block
+        rest = b'' if block[-1:].isspace() or not fields else fields.pop()
+        yield _to_integers(fields)
+    if rest:
+        yield _to_integers([rest])
+
+
+def parse_integers(source, into='list', chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Parse the integers in a string, bytes or an open file (such as sys.stdin) in one pass.
+
+    into picks the result: a 'list' of ints, an 'array' of 64-bit integers (array('q'), 8 bytes each)
+    or a 'numpy' int64 array, filled a block at a time so a large file never exists as one big string.
+    """
+    if isinstance(source, str):
+        source = source.encode()
+    if isinstance(source, (bytes, bytearray)):
+        chunks = [_to_integers(source.translate(COMMAS_TO_SPACES).split())]
+    else:
+        chunks = read_integer_chunks(getattr(source, 'buffer', source), chunk_bytes)
+
+    if into == 'list':
+        result = []
+    elif into == 'array':
+        result = array('q')
+    elif into == 'numpy':
+        if numpy is None:
+            raise ValueError("NumPy is not installed")
+        arrays = [numpy.array(chunk, dtype=numpy.int64) for chunk in chunks]
+        return numpy.concatenate(arrays) if arrays else numpy.empty(0, dtype=numpy.int64)
     else:
-        def is_set(data):
-            data.sort()
-            if not data:
-                return ("True")
-            else:
-                cur_val = data[0]
-                for i in range(1, len(data)):
-                    if data[i] == cur_val:
-                        return ("False")
-                    else:
-                        cur_val = data[i]
-                else:
-                    return ("True")
-
-        first = is_set(setA)
-        second = is_set(setB)
-        if first == "False" or second == "False":
-            empty = []
-            print(empty)
-        elif first == "True" and second == "True":
-            result = []
-            for item in setA:
-                if item in setB:
-                    result.append(item)
-            print(result)
+        raise ValueError(f"Unknown result type: {into!r}")
+    for chunk in chunks:
+        result.extend(chunk)
+    return result
+
+
+def read_list(prompt):
+    """Ask for a comma-separated list until the answer parses; None when the answer is None."""
+    while True:
+        answer = input(prompt)
+        if answer == "None":
+            return None
+        try:
+            return parse_integers(answer)
+        except ValueError as error:
+            print(f"{error}. Please try again.")
 
 
 if __name__ == "__main__":
@@ -105,94 +193,44 @@ if __name__ == "__main__":
     1. make_set(data)
     2. is_set(data)
     3. union(setA, setB)
-    4. intersection(setA, setB) """
+    4. intersection(setA, setB)
+    5. difference(setA, setB)
+    6. symmetric_difference(setA, setB) """
 
     option = input(prompt)
     print()
 
     if option in ('1', '2'):
-
-        nums = input("Please enter a list of numbers separated by commas: ")
-        if nums == "None":
-            final_list = None
-
-        else:
-            """Get the list of numbers, and remove any trailing whitespaces: """
-            num_list = []
-            final_list = []
-            for i in nums.split(','):
-                i = i.strip()
-                num_list.append(i)
-            # print(num_list)
-
-            """Remove any null characters: """
-            for j in num_list[:]:
-                if j == '':
-                    num_list.remove(j)
-            # print(num_list)
-
-            """Convert each character into an integer: """
-            for k in num_list:
-                k = int(k)
-                final_list.append(k)
+        final_list = read_list("Please enter a list of numbers separated by commas: ")
+        if final_list is not None:
             print(f"Your list is: {final_list}")
 
         if option == '1':
-            make_set(final_list)
+            print(make_set(final_list))
 
         elif option == '2':
-            is_set(final_list)
-
-    elif option in ('3', '4'):
-        nums1 = input("Enter your first list separated by commas: ")
-        if nums1 == "None":
-            final_list1 = None
-
-        else:
-            num_list1 = []
-            final_list1 = []
-            for i in nums1.split(','):
-                i = i.strip()
-                num_list1.append(i)
-            # print(num_list)
-
-            for j in range(len(num_list1)):
-                if not num_list1[j]:
-                    del num_list1[j]
-
-            # print(num_list)
-            for k in num_list1:
-                k = int(k)
-                final_list1.append(k)
+            print(is_set(final_list))
+
+    elif option in ('3', '4', '5', '6'):
+        final_list1 = read_list("Enter your first list separated by commas: ")
+        if final_list1 is not None:
             print(f"Your first list is: {final_list1}")
 
-        nums2 = input("Enter your second list separated by commas: ")
-        if nums2 == "None":
-            final_list2 = None
-
-        else:
-            num_list2 = []
-            final_list2 = []
-            for i in nums2.split(','):
-                i = i.strip()
-                num_list2.append(i)
-            # print(num_list)
-
-            for j in num_list2[:]:
-                if not j:
-                    num_list2.remove(j)
-
-            # print(num_list)
-            for k in num_list2:
-                k = int(k)
-                final_list2.append(k)
+        final_list2 = read_list("Enter your second list separated by commas: ")
+        if final_list2 is not None:
             print(f"Your second list is: {final_list2}")
 
         if option == '3':
-            union(final_list1, final_list2)
+            print(union(final_list1, final_list2))
 
         elif option == '4':
-            intersection(final_list1, final_list2)
+            print(intersection(final_list1, final_list2))
+
+        elif option == '5':
+            print(difference(final_list1, final_list2))
+
+        elif option == '6':
+            print(symmetric_difference(final_list1, final_list2))
 
     else:
-        print("Invalid option. Please try again.")
\ No newline at end of file
+        print("Invalid option. Please try again.")
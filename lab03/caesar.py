@@ -1,78 +1,185 @@
-class Caesar:
+import os
+import sys
+import string
+import argparse
+from functools import lru_cache, partial
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
-    def __init__(self):
-        self.key = 0
+CHUNK_SIZE = 1 << 22  # Characters read per chunk when translating files
 
-    def set_key(self, num):
-        self.key = num % 26
 
-    def get_key(self):
-        return self.key
-
-    def encrypt(self, plaintext):
-        plaintext = plaintext.lower()
-        first_list = []
-        second_list = []
-        final = ""
-        for i in plaintext:
-            if i == " ":
-                first_list.append(32)
+# Alphabets that can be named; any other string is used as a custom alphabet
+ALPHABETS = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+}
+DEFAULT_ALPHABETS = ("lower", "upper")
 
-            elif ord(i) in range(97, 123):
-                j = ord(i) + self.key
-                if j > 122:
-                    j = 97 + (j - 123)
-                first_list.append(j)
 
-            else:
-                j = ord(i) + self.key
-                first_list.append(j)
+class Caesar:
+    """Rotates the characters of each alphabet within that alphabet; every other character is kept.
 
-        #return first_list
+    alphabets are names from ALPHABETS or the characters of custom alphabets. The default keeps
+    case by shifting lowercase and uppercase letters separately.
+    """
 
-        for k in first_list:
-            l = chr(k)
-            second_list.append(l)
-        #return second_list
+    def __init__(self, alphabets=DEFAULT_ALPHABETS):
+        self.key = 0
+        self.alphabets = tuple(alphabets)
+        _shift_table(self.alphabets, 0)  # Rejects overlapping alphabets straight away
 
-        for m in second_list:
-            final += m
+    def set_key(self, num):
+        self.key = num  # Each alphabet reduces it modulo its own length
 
-        return final
+    def get_key(self):
+        return self.key
 
+    def encrypt(self, plaintext):
+        return plaintext.translate(_shift_table(self.alphabets, self.key))
 
     def decrypt(self, ciphertext):
-        third_list = []
-        fourth_list = []
-        final2 = ""
-
-        for i in ciphertext:
-            if i == " ":
-                third_list.append(32)
-
-            elif ord(i) in range(97, 123):
-                j = ord(i) - self.key
-                if j < 97:
-                    j = 122 - (96 - j)
-                third_list.append(j)
-
-            else:
-                j = ord(i) - self.key
-                third_list.append(j)
-
-
-        for k in third_list:
-            l = chr(k)
-            fourth_list.append(l)
-        #return second_list
-
-        for m in fourth_list:
-            final2 += m
+        return ciphertext.translate(_shift_table(self.alphabets, -self.key))
+
+    def translate_file(self, source, destination, decrypt=False, chunk_size=CHUNK_SIZE):
+        """Encrypt or decrypt text file source into destination a chunk at a time. Returns the characters written."""
+        translate = self.decrypt if decrypt else self.encrypt
+        total = 0
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return total
+            destination.write(translate(chunk))
+            total += len(chunk)
+
+
+def shifted_alphabets(alphabets, shift):
+    """The characters of all the alphabets, and the same characters with each alphabet rotated by shift.
+
+    Alphabets are names from ALPHABETS or the characters of a custom alphabet.
+    """
+    alphabets = [ALPHABETS.get(alphabet, alphabet) for alphabet in alphabets]
+    source = ''.join(alphabets)
+    if len(set(source)) != len(source):
+        raise ValueError("Alphabets must not repeat or share characters")
+    target = ''.join(letters[shift % len(letters):] + letters[:shift % len(letters)] for letters in alphabets if letters)
+    return source, target
+
+
+@lru_cache(maxsize=1024)
+def _shift_table(alphabets, shift):
+    """str.translate table rotating each alphabet by shift, built once per (alphabets, shift) pair."""
+    return str.maketrans(*shifted_alphabets(alphabets, shift))
+
+
+def _open_text(path, mode):
+    """Open path as UTF-8 text, or use standard input or output for '-'."""
+    if path == '-':
+        return nullcontext(sys.stdin if mode == 'r' else sys.stdout)
+    # newline='' keeps line endings as they are
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def translate_path(job, key, decrypt, alphabets=DEFAULT_ALPHABETS):
+    """Translate one (source, destination) pair; returns {"Characters": written} or {"Error": message}."""
+    source, destination = job
+    cipher = Caesar(alphabets)
+    cipher.set_key(key)
+    try:
+        if (source != '-' and destination != '-' and os.path.exists(destination)
+                and os.path.samefile(source, destination)):
+            raise ValueError(f"{source} would be overwritten while it is read")
+        with _open_text(source, 'r') as infile, _open_text(destination, 'w') as outfile:
+            return {"Characters": cipher.translate_file(infile, outfile, decrypt)}
+    except (OSError, UnicodeDecodeError, ValueError) as error:
+        return {"Error": f"{type(error).__name__}: {error}"}
+
+
+def output_name(source, mode, suffix):
+    """Where a file is written when several are translated: suffix added, or removed when decrypting."""
+    if mode == 'decrypt' and source.endswith(suffix):
+        return source[:-len(suffix)]
+    return source + (suffix if mode == 'encrypt' else '.dec')
+
+
+def check_outputs(parser, jobs, force):
+    """Stop with a usage error if outputs clash with each other or an input, or exist and force is not set."""
+    destinations = [destination for _, destination in jobs]
+    if len(set(destinations)) != len(destinations):
+        parser.error("several inputs would be written to the same output file")
+    existing = [destination for destination in destinations if os.path.exists(destination)]
+    # A missing input is reported when it is translated; '-' is standard input
+    sources = [source for source, _ in jobs if source != '-' and os.path.exists(source)]
+    if any(os.path.samefile(destination, source) for destination in existing for source in sources):
+        parser.error("an input file would also be written as an output")
+    if existing and not force:
+        parser.error(f"{', '.join(existing)} already exist{'s' if len(existing) == 1 else ''}; use --force to overwrite")
+
+
+def add_file_arguments(parser):
+    """Register the arguments for translating files shared with the functional cipher in lab10."""
+    parser.add_argument('mode', choices=['encrypt', 'decrypt'])
+    parser.add_argument('files', nargs='*', help="files to translate (default: standard input)")
+    parser.add_argument('-k', '--key', type=int, required=True)
+    parser.add_argument('-o', '--output',
+                        help="output file for a single input (default: standard output); several inputs "
+                             "are each written next to the input instead")
+    parser.add_argument('--suffix', default='.enc',
+                        help="added to each encrypted file and removed from each decrypted one (default: .enc)")
+    parser.add_argument('-f', '--force', action='store_true',
+                        help="overwrite files that already exist where several inputs are written")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="processes used for several files (default: number of CPUs)")
+    parser.add_argument('--alphabet', action='append', metavar='ALPHABET',
+                        help="lower, upper, digits or the characters of a custom alphabet; repeat for several "
+                             "(default: lower and upper)")
+    return parser
+
+
+def file_jobs(parser, args):
+    """The (source, destination) pairs to translate, from the arguments of add_file_arguments."""
+    files = args.files or ['-']
+    if len(files) == 1:
+        return [(files[0], args.output or '-')]
+    if args.output:
+        parser.error("--output needs a single input file")
+    jobs = [(source, output_name(source, args.mode, args.suffix)) for source in files]
+    check_outputs(parser, jobs, args.force)
+    return jobs
+
+
+def run_files(argv):
+    """Encrypt or decrypt files or standard input from the command line. Returns the exit status."""
+    parser = add_file_arguments(argparse.ArgumentParser(description="Caesar cipher for UTF-8 text files and pipes"))
+    args = parser.parse_intermixed_args(argv)  # Files may come after the options
+    jobs = file_jobs(parser, args)
+
+    alphabets = tuple(args.alphabet or DEFAULT_ALPHABETS)
+    try:
+        Caesar(alphabets)
+    except ValueError as error:
+        parser.error(str(error))
+
+    work = partial(translate_path, key=args.key, decrypt=args.mode == 'decrypt', alphabets=alphabets)
+    if args.workers == 1 or len(jobs) == 1:
+        results = list(map(work, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(work, jobs))
+    failed = 0
+    for (source, _), result in zip(jobs, results):
+        if "Error" in result:
+            print(f"{source}: {result['Error']}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
 
-        return final2
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_files(argv))
 
-if __name__ == "__main__":
     cipher = Caesar()
     key = int(input("Please enter the key: "))
     cipher.set_key(key)
@@ -88,4 +195,8 @@ if __name__ == "__main__":
     else:
         print("Have a nice day.")
 
-    #print(cipher.decrypt())
\ No newline at end of file
+    #print(cipher.decrypt())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import os
+import re
+import zlib
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from rpg3 import Inventory, decode, encode_compact, item_from_json
+from item_table import item_flags, set_flags
+from inventory_snapshot import Snapshot, save_snapshot
+
+# Opcode -> the method whose change the event records
+EVENTS = ['add_item', 'drop_item', 'pick_up', 'throw_away', 'equip', 'use']
+OPCODES = {event: code for code, event in enumerate(EVENTS)}
+# An event is the CRC-32 of the rest of it, then EVENT, then the payload
+CHECKSUM = struct.Struct('<I')
+EVENT = struct.Struct('<BII')  # Opcode, item id, payload length
+DEFAULT_COMPACT_BYTES = 4 << 20  # Log size after which a new snapshot is made
+FILE_NAME = re.compile(r'(snapshot|log)\.(\d+)')
+
+
+def _path(directory, kind, generation):
+    return os.path.join(directory, f"{kind}.{generation:08d}")
+
+
+def _generations(directory, kind):
+    """The generations of the snapshots or logs in directory, in ascending order."""
+    found = (FILE_NAME.fullmatch(name) for name in os.listdir(directory))
+    return sorted(int(match.group(2)) for match in found if match and match.group(1) == kind)
+
+
+def read_log(path):
+    """The (opcode, item id, payload) events of a log and the length of its complete part.
+
+    Reading stops at the first event that is cut short or fails its checksum, as the last
+    event of a log can be when the process dies while writing it.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    events = []
+    position = 0
+    while position + CHECKSUM.size + EVENT.size <= len(data):
+        checksum, = CHECKSUM.unpack_from(data, position)
+        opcode, item_id, length = EVENT.unpack_from(data, position + CHECKSUM.size)
+        start = position + CHECKSUM.size + EVENT.size
+        end = start + length
+        if end > len(data) or zlib.crc32(data[position + CHECKSUM.size:end]) != checksum or opcode >= len(EVENTS):
+            break
+        events.append((opcode, item_id, data[start:end]))
+        position = end
+    return events, position
+
+
+def _load(directory, generation):
+    """The inventory of a snapshot, with every item owned as it was when it was saved."""
+    with Snapshot(_path(directory, 'snapshot', generation)) as snapshot:
+        inventory = Inventory(snapshot.owner)
+        for item in snapshot:
+            ownership = item._ownership
+            inventory.add_item(item)
+            item._ownership = ownership  # add_item gives it to the owner
+    return inventory
+
+
+def replay(inventory, events):
+    """Apply the events of one log to the inventory its generation starts from.
+
+    Item ids are positions in the backpack when the log was started, and items added
+    afterwards get the ids after those. Returns the id -> item mapping at the end.
+    """
+    items = dict(enumerate(inventory))
+    for opcode, item_id, payload in events:
+        event = EVENTS[opcode]
+        if event == 'add_item':
+            item = item_from_json(decode(payload[1:]))
+            set_flags(item, payload[0])
+            inventory.add_item(item)
+            items[item_id] = item
+            continue
+        item = items.get(item_id)
+        if item is None:
+            raise ValueError(f"The log refers to unknown item {item_id}")
+        if event == 'drop_item':
+            inventory.drop_item(items.pop(item_id))
+        elif event == 'pick_up':
+            item.pick_up(decode(payload))
+        else:
+            getattr(item, event)()
+    return items
+
+
+def compact(directory, generation):
+    """Fold a log into the snapshot of its generation, giving the snapshot of the next one, then delete both."""
+    inventory = _load(directory, generation)
+    events, _ = read_log(_path(directory, 'log', generation))
+    replay(inventory, events)
+    save_snapshot(inventory, _path(directory, 'snapshot', generation + 1))
+    os.remove(_path(directory, 'log', generation))
+    os.remove(_path(directory, 'snapshot', generation))
+
+
+class Journal:
+    """Saves an inventory as a snapshot plus an append-only log of what changed since.
+
+    While attached, add_item, drop_item, pick_up, throw_away, equip and use each append a
+    compact event to a buffer, and flush() writes the buffer to the log, so a save costs the
+    changes rather than the whole backpack. Once the log passes compact_after bytes,
+    checkpoint() starts a new log and a background process folds the old one into a new
+    snapshot. Journal.recover() loads the latest snapshot and replays the logs after it.
+    """
+
+    def __init__(self, inventory, directory, generation, compact_after=DEFAULT_COMPACT_BYTES):
+        self.inventory = inventory
+        self.directory = directory
+        self.generation = generation
+        self.compact_after = compact_after
+        self._ids = {item: item_id for item_id, item in enumerate(inventory)}
+        self._next_id = len(self._ids)
+        self._pending = bytearray()
+        self._log = open(_path(directory, 'log', generation), 'ab')
+        self._log_size = self._log.tell()
+        self._executor = None
+        self._compactions = []
+        inventory.journal = self
+        for item in inventory:
+            item._journal = self
+
+    @classmethod
+    def create(cls, inventory, directory, compact_after=DEFAULT_COMPACT_BYTES):
+        """Start journaling an inventory in an empty directory, beginning with a full snapshot."""
+        os.makedirs(directory, exist_ok=True)
+        if _generations(directory, 'snapshot') or _generations(directory, 'log'):
+            raise ValueError(f"{directory} already holds a journal; use Journal.recover")
+        save_snapshot(inventory, _path(directory, 'snapshot', 0))
+        return cls(inventory, directory, 0, compact_after)
+
+    @classmethod
+    def recover(cls, directory, compact_after=DEFAULT_COMPACT_BYTES):
+        """Rebuild the journaled inventory from its latest snapshot and logs, and keep journaling it."""
+        snapshots = _generations(directory, 'snapshot')
+        if not snapshots:
+            raise ValueError(f"{directory} holds no inventory snapshot")
+        latest = snapshots[-1]
+        # Left behind when a compaction was interrupted after writing its snapshot
+        for generation in _generations(directory, 'log'):
+            if generation < latest:
+                os.remove(_path(directory, 'log', generation))
+        for generation in snapshots[:-1]:
+            os.remove(_path(directory, 'snapshot', generation))
+
+        inventory = _load(directory, latest)
+        logs = _generations(directory, 'log') or [latest]
+        items = dict(enumerate(inventory))
+        for generation in logs:
+            path = _path(directory, 'log', generation)
+            if not os.path.exists(path):
+                continue
+            events, length = read_log(path)
+            if length < os.path.getsize(path):
+                if generation != logs[-1]:
+                    raise ValueError(f"{path} is damaged")
+                with open(path, 'r+b') as file:
+                    file.truncate(length)  # Drop the event that was being written
+            items = replay(inventory, events)
+
+        journal = cls(inventory, directory, logs[-1], compact_after)
+        # Ids carry on from the last log rather than restarting at backpack positions
+        journal._ids = {item: item_id for item_id, item in items.items()}
+        journal._next_id = max(items, default=-1) + 1
+        for generation in logs[:-1]:
+            journal._compact(generation)
+        return journal
+
+    def record(self, item, event, argument=None):
+        """Buffer the event for a change the inventory or one of its items has just made."""
+        if event == 'add_item':
+            if item in self._ids:  # Adding it again only gives it back to the owner
+                event, argument = 'pick_up', self.inventory.owner
+            else:
+                item._journal = self
+                self._ids[item] = self._next_id
+                self._next_id += 1
+                argument = bytes([item_flags(item)]) + encode_compact(item.to_json()).encode('utf-8')
+        item_id = self._ids[item]
+        if event == 'drop_item':
+            del self._ids[item]
+            item._journal = None
+        if event == 'pick_up':
+            argument = encode_compact(argument).encode('utf-8')
+        payload = argument or b''
+        body = EVENT.pack(OPCODES[event], item_id, len(payload)) + payload
+        self._pending += CHECKSUM.pack(zlib.crc32(body)) + body
+
+    def _write(self, sync):
+        if self._pending:
+            self._log.write(self._pending)
+            self._log_size += len(self._pending)
+            self._pending.clear()
+        self._log.flush()
+        if sync:
+            os.fsync(self._log.fileno())
+
+    def flush(self, sync=True):
+        """Write the buffered events to the log, by default waiting until they are on disk."""
+        self._write(sync)
+        if self._log_size >= self.compact_after:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Start a new log and fold the current one into a new snapshot in the background."""
+        self._write(sync=True)
+        self._log.close()
+        self._compact(self.generation)
+        self.generation += 1
+        # Events of the new log use backpack positions in the state it starts from
+        self._ids = {item: item_id for item_id, item in enumerate(self.inventory)}
+        self._next_id = len(self._ids)
+        self._log = open(_path(self.directory, 'log', self.generation), 'ab')
+        self._log_size = 0
+
+    def _compact(self, generation):
+        # One worker, so each generation is compacted after the one before it
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        self._compactions = [future for future in self._compactions if not future.done() or future.exception()]
+        self._compactions.append(self._executor.submit(compact, self.directory, generation))
+
+    def close(self):
+        """Flush the log, wait for any compaction to finish and stop journaling the inventory."""
+        self._write(sync=True)
+        self._log.close()
+        self.inventory.journal = None
+        for item in self.inventory:
+            item._journal = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            for future in self._compactions:
+                future.result()  # Raises the error of a compaction that failed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,153 @@
+import os
+import mmap
+import struct
+import tempfile
+
+from rpg3 import Inventory
+from item_table import CLASS_CODES, ITEM_CLASSES, StringTable, build_item, item_flags
+
+MAGIC = b'RPGI'
+VERSION = 1
+# Magic, version, record size, item count, owner string id, string count, start of the string table
+HEADER = struct.Struct('<4sHHIIIQ4x')
+# Class code, flags, the string ids of name, description, rarity, ownership and type, then damage and defense
+RECORD = struct.Struct('<BB2x5Idd')
+# Start and end of a string in the string data
+SPAN = struct.Struct('<2Q')
+NO_STRING = 0xFFFFFFFF  # String id standing for None
+WRITE_BATCH = 1000  # Records packed per write
+
+
+def _string_id(strings, value):
+    return NO_STRING if value is None else strings.intern(value)
+
+
+def write_snapshot(inventory, file):
+    """Write an inventory to a seekable binary file in one pass over its items.
+
+    The file is a HEADER, one fixed-width RECORD per item in backpack order, then the string
+    table: a SPAN per distinct string followed by the UTF-8 bytes of all of them. The header
+    is filled in last, once the size of the string table is known.
+    """
+    start = file.tell()
+    file.write(bytes(HEADER.size))
+    strings = StringTable()
+    owner_id = _string_id(strings, inventory.owner)
+    items = inventory.backpack
+    for batch_start in range(0, len(items), WRITE_BATCH):
+        file.write(b''.join(
+            RECORD.pack(CLASS_CODES[type(item)], item_flags(item), _string_id(strings, item.name),
+                        _string_id(strings, item.description), _string_id(strings, item.rarity),
+                        _string_id(strings, item._ownership), _string_id(strings, getattr(item, 'type', None)),
+                        getattr(item, 'damage', 0), getattr(item, 'defense', 0))
+            for item in items[batch_start:batch_start + WRITE_BATCH]))
+
+    strings_at = file.tell() - start
+    encoded = [value.encode('utf-8') for value in strings.values]
+    spans = []
+    position = 0
+    for value in encoded:
+        spans.append(SPAN.pack(position, position + len(value)))
+        position += len(value)
+    file.write(b''.join(spans))
+    file.write(b''.join(encoded))
+
+    end = file.tell()
+    file.seek(start)
+    file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(items), owner_id, len(encoded), strings_at))
+    file.seek(end)
+
+
+def save_snapshot(inventory, path):
+    """Write a snapshot of inventory to path, replacing any earlier one only once it is complete."""
+    descriptor, temporary = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            write_snapshot(inventory, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+class Snapshot:
+    """A snapshot file mapped into memory. Opening it only reads the header; an item is decoded when it is read.
+
+    snapshot[i] builds the i-th item of the saved backpack from its record, and strings are
+    decoded the first time a record refers to them.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is not an inventory snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, owner_id, string_count, strings_at = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an inventory snapshot")
+        # Later versions may only append fields to the records, so the size is taken from the file
+        if version > VERSION or record_size < RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is a version {version} snapshot; this reader supports up to {VERSION}")
+        self._data_at = strings_at + string_count * SPAN.size
+        if HEADER.size + count * record_size > strings_at or self._data_at > size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self._record_size = record_size
+        self._count = count
+        self._string_count = string_count
+        self._strings_at = strings_at
+        self._strings = {NO_STRING: None}
+        self.owner = self.string(owner_id)
+
+    def string(self, string_id):
+        """The string with this id, decoded once and then kept."""
+        value = self._strings.get(string_id)
+        if value is None and string_id not in self._strings:
+            if string_id >= self._string_count:
+                raise ValueError(f"String id {string_id} is out of range")
+            start, end = SPAN.unpack_from(self._map, self._strings_at + string_id * SPAN.size)
+            value = self._strings[string_id] = self._map[self._data_at + start:self._data_at + end].decode('utf-8')
+        return value
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not -self._count <= index < self._count:
+            raise IndexError("snapshot index out of range")
+        kind, flags, *string_ids, damage, defense = RECORD.unpack_from(
+            self._map, HEADER.size + index % self._count * self._record_size)
+        if kind >= len(ITEM_CLASSES):
+            raise ValueError(f"Unknown item class code {kind}")
+        name, description, rarity, ownership, type = map(self.string, string_ids)
+        return build_item(kind, name, description, rarity, ownership, type, damage, defense, flags)
+
+    def __iter__(self):
+        return (self[index] for index in range(self._count))
+
+    def to_inventory(self):
+        """An Inventory holding every item of the snapshot."""
+        inventory = Inventory(self.owner)
+        for item in self:
+            inventory.add_item(item)
+        return inventory
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_snapshot(path):
+    """Read a whole snapshot back as an Inventory."""
+    with Snapshot(path) as snapshot:
+        return snapshot.to_inventory()
@@ -0,0 +1,188 @@
+import sys
+from array import array
+
+from rpg3 import Item, Weapon, Shield, Potion
+
+# Class code -> item class; the code is stored in the kinds column
+ITEM_CLASSES = [Item, Weapon, Shield, Potion]
+CLASS_CODES = {cls: code for code, cls in enumerate(ITEM_CLASSES)}
+
+# Bits of the flags column
+USED = 1
+EQUIPPED = 2
+BROKEN = 4
+
+
+class StringTable:
+    """Each distinct value stored once; items refer to it by its index. None and '' are values too."""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def intern(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __getitem__(self, value_id):
+        return self.values[value_id]
+
+
+def _number(value):
+    """Numbers are stored as doubles; give back ints for whole numbers, as items are usually created with."""
+    return int(value) if value.is_integer() else value
+
+
+def item_flags(item):
+    """The USED, EQUIPPED and BROKEN bits of an item."""
+    flags = 0
+    if getattr(item, '_used', False):
+        flags |= USED
+    if getattr(item, '_equipped', False):
+        flags |= EQUIPPED
+    if getattr(item, 'broken', False):
+        flags |= BROKEN
+    return flags
+
+
+def set_flags(item, flags):
+    """Give an item the used and equipped state stored in flags, for the classes that have it."""
+    if isinstance(item, (Weapon, Shield, Potion)):
+        item._used = bool(flags & USED)
+    if isinstance(item, (Weapon, Shield)):
+        item._equipped = bool(flags & EQUIPPED)
+
+
+def build_item(kind, name, description, rarity, ownership, type, damage, defense, flags):
+    """A new item of class code kind from the values of a stored row."""
+    cls = ITEM_CLASSES[kind]
+    common = {'name': name, 'description': description, 'rarity': rarity, 'ownership': ownership}
+    if cls is Weapon:
+        item = Weapon(damage=_number(damage), type=type, **common)
+    elif cls is Shield:
+        item = Shield(defense=_number(defense), broken=bool(flags & BROKEN), **common)
+    elif cls is Potion:
+        item = Potion(type=type, **common)
+    else:
+        item = Item(**common)
+    set_flags(item, flags)
+    return item
+
+
+class ItemTable:
+    """Many items stored as parallel typed arrays, one column per attribute, about 40 bytes an item.
+
+    Strings (names, descriptions, rarities, types, owners) are interned in one StringTable and stored
+    as 32-bit ids. table[i] is a lightweight ItemView of row i; item(i) builds a real item again.
+    """
+
+    def __init__(self, items=()):
+        self.strings = StringTable()
+        self.kinds = array('B')
+        self.names = array('I')
+        self.descriptions = array('I')
+        self.rarities = array('I')
+        self.owners = array('I')
+        self.types = array('I')
+        self.damage = array('d')
+        self.defense = array('d')
+        self.flags = array('B')
+        self.extend(items)
+
+    def append(self, item):
+        """Store an item as a new row and return its index."""
+        intern = self.strings.intern
+        self.kinds.append(CLASS_CODES[type(item)])
+        self.names.append(intern(item.name))
+        self.descriptions.append(intern(item.description))
+        self.rarities.append(intern(item.rarity))
+        self.owners.append(intern(item._ownership))
+        self.types.append(intern(getattr(item, 'type', None)))
+        self.damage.append(getattr(item, 'damage', 0))
+        self.defense.append(getattr(item, 'defense', 0))
+        self.flags.append(item_flags(item))
+        return len(self.kinds) - 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("item table index out of range")
+        return ItemView(self, index % len(self))
+
+    def __iter__(self):
+        return (ItemView(self, index) for index in range(len(self)))
+
+    def item(self, index):
+        """A new item object with the attributes stored in row index."""
+        strings = self.strings
+        return build_item(self.kinds[index], strings[self.names[index]], strings[self.descriptions[index]],
+                          strings[self.rarities[index]], strings[self.owners[index]], strings[self.types[index]],
+                          self.damage[index], self.defense[index], self.flags[index])
+
+    def nbytes(self):
+        """Approximate memory taken by the columns and the interned strings, in bytes."""
+        columns = (self.kinds, self.names, self.descriptions, self.rarities, self.owners,
+                   self.types, self.damage, self.defense, self.flags)
+        return (sum(sys.getsizeof(column) for column in columns) + sys.getsizeof(self.strings.values)
+                + sum(sys.getsizeof(value) for value in self.strings.values))
+
+
+class ItemView:
+    """Read access to one row of an ItemTable without building an item object."""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def item_class(self):
+        return ITEM_CLASSES[self.table.kinds[self.index]]
+
+    @property
+    def name(self):
+        return self.table.strings[self.table.names[self.index]]
+
+    @property
+    def description(self):
+        return self.table.strings[self.table.descriptions[self.index]]
+
+    @property
+    def rarity(self):
+        return self.table.strings[self.table.rarities[self.index]]
+
+    @property
+    def ownership(self):
+        return self.table.strings[self.table.owners[self.index]]
+
+    @property
+    def type(self):
+        return self.table.strings[self.table.types[self.index]]
+
+    @property
+    def damage(self):
+        return _number(self.table.damage[self.index])
+
+    @property
+    def defense(self):
+        return _number(self.table.defense[self.index])
+
+    @property
+    def broken(self):
+        return bool(self.table.flags[self.index] & BROKEN)
+
+    def item(self):
+        return self.table.item(self.index)
+
+    def __str__(self):
+        return str(self.item())
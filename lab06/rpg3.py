@@ -1,18 +1,63 @@
+import re
 import json
 
+try:
+    import orjson
+except ImportError:  # The standard json module is used instead
+    orjson = None
+
+# Class name stored under 'class' in the JSON data -> item class
+ITEM_REGISTRY = {}
+STREAM_CHUNK_SIZE = 1 << 20  # Characters read at a time when loading a saved inventory
+WRITE_BATCH = 1000  # Items encoded per write when saving
+LOAD_BATCH = 1000  # Item lines decoded at once when loading a file written by dump_inventory
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# The first line dump_inventory writes
+DUMP_HEADER = re.compile(r'\{"owner":(.*),"backpack":\[\n?')
+
+
+def register_item(cls):
+    """Class decorator making an item class loadable from JSON by its name."""
+    ITEM_REGISTRY[cls.__name__] = cls
+    return cls
+
+
+def item_from_json(data):
+    """Create the item described by data, whose 'class' must be a registered item class."""
+    if not isinstance(data, dict) or 'class' not in data:
+        raise ValueError(f"Not an item: {data!r}")
+    data = dict(data)
+    class_name = data.pop('class')
+    item_class = ITEM_REGISTRY.get(class_name)
+    if item_class is None:
+        raise ValueError(f"Unknown item class: {class_name}")
+    return item_class.from_json(data)
+
+
+@register_item
 class Item:
+    __slots__ = ('name', 'description', 'rarity', '_ownership', '_journal')
+
     def __init__(self, name, description='', rarity='common', ownership=''):
         self.name = name
         self.description = description
         self.rarity = rarity
         self._ownership = ownership
+        self._journal = None  # Set while the item is in an inventory that keeps a journal
+
+    def _record(self, event, argument=None):
+        """Report a change of this item to the journal of its inventory, if there is one."""
+        if self._journal is not None:
+            self._journal.record(self, event, argument)
 
     def pick_up(self, character: str) -> str:
         self._ownership = character
+        self._record('pick_up', character)
         return f"{self.name} is now owned by {self._ownership}."
 
     def throw_away(self) -> str:
         self._ownership = None
+        self._record('throw_away')
         return f"{self.name} is thrown away."
 
     def use(self):
@@ -43,7 +88,10 @@ class Item:
         return cls(**data)
 
 
+@register_item
 class Weapon(Item):
+    __slots__ = ('damage', 'type', '_used', '_equipped')
+
     def __init__(self, name, damage, type, description='', rarity='common', ownership=''):
         super().__init__(name, description, rarity, ownership)
         self.damage = damage
@@ -60,6 +108,7 @@ class Weapon(Item):
         if self._used:
             return ''
         self._used = True
+        self._record('use')
 
         if self.rarity == 'legendary':
             att_mult = 1.15
@@ -95,6 +144,7 @@ class Weapon(Item):
         if self._ownership == '':
             return ''
         self._equipped = True
+        self._record('equip')
         return f"{self.name} is equipped by {self._ownership}."
 
     def to_json(self):
@@ -109,7 +159,10 @@ class Weapon(Item):
         """Create a Weapon instance from JSON data."""
         return cls(**data)
 
+@register_item
 class Shield(Item):
+    __slots__ = ('defense', 'broken', '_used', '_equipped')
+
     def __init__(self, name, defense, broken, description='', rarity='common', ownership=''):
         super().__init__(name, description, rarity, ownership)
         self.defense = defense
@@ -125,6 +178,7 @@ class Shield(Item):
         if self._used:
             return ''
         self._used = True
+        self._record('use')
 
         def_mult = float
         if self.broken == True:
@@ -140,6 +194,7 @@ class Shield(Item):
         if self._ownership == '':
             return ''
         self._equipped = True
+        self._record('equip')
         return f"{self.name} is equipped by {self._ownership}."
 
     def to_json(self):
@@ -155,14 +210,18 @@ class Shield(Item):
         return cls(**data)
 
 
+@register_item
 class Potion(Item):
+    __slots__ = ('type', '_used', 'value', 'time', 'hp_time')
+
     def __init__(self, name, type, description='', rarity='common', ownership=''):
         super().__init__(name, description, rarity, ownership)
         self.type = type
         self._used = False
-        self.value = int
-        self.time = int
-        self.hp_time = str
+        # Set when the potion is used
+        self.value = None
+        self.time = None
+        self.hp_time = None
 
     def use(self) -> str:
         if self._ownership == '':
@@ -170,6 +229,7 @@ class Potion(Item):
         if self._used:
             return "This potion has already been consumed."
         self._used = True
+        self._record('use')
 
         if self.rarity.lower() == 'common':
             self.value = 50
@@ -195,29 +255,79 @@ class Potion(Item):
         """Create a Potion instance from JSON data."""
         return cls(**data)
 class Inventory:
+    """Items indexed by identity, name, class and rarity, so lookups never scan the backpack.
+
+    Every index is a dict used as an insertion-ordered set, and add_item/drop_item keep them
+    all up to date. An item is indexed under the name and rarity it had when it was added;
+    _items keeps those keys, so the item can be removed even if they have changed since.
+    """
+
     def __init__(self, owner=None):
         self.owner = owner
-        self.backpack = []
+        self.journal = None  # An inventory_journal.Journal records every change once attached
+        self._items = {}
+        self._by_name = {}
+        self._by_class = {}
+        self._by_rarity = {}
+
+    @property
+    def backpack(self):
+        """The items in the order they were added, as a new list."""
+        return list(self._items)
+
+    def _indexes(self, item, keys):
+        name, rarity = keys
+        return ((self._by_name, name), (self._by_class, type(item)), (self._by_rarity, rarity))
+
+    def _unindex(self, item, keys):
+        for index, key in self._indexes(item, keys):
+            bucket = index[key]
+            del bucket[item]
+            if not bucket:
+                del index[key]
 
     def add_item(self, item):
         if item._ownership:  # If the item is owned, remove from previous owner
             item._ownership = None
         item._ownership = self.owner  # Change the ownership to the current owner
-        self.backpack.append(item)
+        keys = (item.name, item.rarity)
+        old_keys = self._items.get(item)
+        if old_keys != keys:  # New, or added again after its name or rarity changed
+            if old_keys is not None:
+                self._unindex(item, old_keys)
+            self._items[item] = keys
+            for index, key in self._indexes(item, keys):
+                index.setdefault(key, {})[item] = None
+        if self.journal is not None:
+            self.journal.record(item, 'add_item')
         return f"{item.name} added to {self.owner}'s backpack."
 
     def drop_item(self, item):
-        if item in self.backpack:
-            self.backpack.remove(item)
+        if item in self._items:
+            self._unindex(item, self._items.pop(item))
+            if self.journal is not None:
+                self.journal.record(item, 'drop_item')
             item._ownership = None  # Remove ownership when the item is removed
             return f"{item.name} removed from {self.owner}'s backpack."
         else:
             return f"{item.name} not found in {self.owner}'s backpack."
 
+    def find(self, name):
+        """Items with this name."""
+        return list(self._by_name.get(name, ()))
+
+    def items_of(self, item_class):
+        """Items of this class or its subclasses."""
+        return [item for cls, items in self._by_class.items() if issubclass(cls, item_class) for item in items]
+
+    def with_rarity(self, rarity):
+        """Items of this rarity."""
+        return list(self._by_rarity.get(rarity, ()))
+
     def view(self, type=None, item=None):
         """View either the entire collection, a specific item, or items by type"""
         if item:  # View individual item
-            if item in self.backpack:
+            if item in self._items:
                 return str(item)
             else:
                 return f"{item.name} is not in the backpack."
@@ -227,34 +337,23 @@ class Inventory:
                 'shield': Shield,
                 'potion': Potion
             }
-            item_type = type_map.get(type)
             if type in type_map:
-                return [str(i) for i in self.backpack if isinstance(i, item_type)]
+                return [str(i) for i in self.items_of(type_map[type])]
             else:
                 return f"No items of type {type} found."
         else:  # View all items
-            return [str(i) for i in self.backpack]
-
+            return [str(i) for i in self._items]
 
     def __iter__(self):
         """Make Inventory class iterable"""
-        self._index = 0
-        return self
-
-
-    def __next__(self):
-        if self._index < len(self.backpack):
-            item = self.backpack[self._index]
-            self._index += 1
-            return item
-        else:
-            raise StopIteration
+        return iter(list(self._items))
 
+    def __len__(self):
+        return len(self._items)
 
     def __contains__(self, item):
         """Support 'in' operator to check if item is in inventory"""
-        return item in self.backpack
-
+        return item in self._items
 
     def to_json(self):
         """Convert the inventory and all its items to a JSON-serializable object."""
@@ -271,9 +370,7 @@ class Inventory:
         """Create an Inventory instance from JSON data."""
         inventory = cls(owner=data['owner'])
         for item_data in data['backpack']:
-            item_class = globals()[item_data.pop('class')]
-            item = item_class.from_json(item_data)
-            inventory.add_item(item)
+            inventory.add_item(item_from_json(item_data))
         return inventory
 
 # Function to serialize custom objects with json.dump
@@ -283,6 +380,171 @@ def custom_serializer(obj):
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable.")
 
 
+def decode(text):
+    """Parse JSON text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def encode_compact(value):
+    """value as compact JSON text with no indent, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+
+def dump_inventory(inventory, file):
+    """Write an inventory as compact JSON to a text file, encoding a batch of items at a time.
+
+    The document is the same as Inventory.to_json's, with one item per line, so it never
+    exists in memory as a whole.
+    """
+    file.write('{"owner":' + encode_compact(inventory.owner) + ',"backpack":[')
+    items = inventory.backpack
+    for start in range(0, len(items), WRITE_BATCH):
+        batch = ',\n'.join(encode_compact(item.to_json()) for item in items[start:start + WRITE_BATCH])
+        file.write(('\n' if start == 0 else ',\n') + batch)
+    file.write('\n]}\n')
+
+
+class _JsonStream:
+    """Reads JSON values one at a time from a text file, refilling a buffer as they are needed."""
+
+    def __init__(self, file, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Read the next chunk, dropping what has been consumed. Returns False at the end of the file."""
+        chunk = '' if self.exhausted else self.file.read(self.chunk_size)
+        if not chunk:
+            self.exhausted = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """The next character that is not whitespace, without consuming it; '' at the end of the file."""
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in the saved inventory, found {found or 'the end of the file'!r}")
+        self.position += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may go on in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+
+    def separator(self, closing):
+        """Consume a ',' and return False, or the closing character and return True."""
+        found = self.peek()
+        if found not in (',', closing):
+            raise ValueError(f"Expected ',' or {closing!r} in the saved inventory, found {found or 'the end of the file'!r}")
+        self.position += 1
+        return found == closing
+
+    def array(self):
+        """Yield the values of the array that starts here, one at a time."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.separator(']'):
+                return
+
+
+def _iter_dumped_items(file):
+    """Items of a file written by dump_inventory after its first line, decoding a batch of lines per call."""
+    def decode_batch(lines):
+        return decode('[' + ''.join(lines).rstrip().rstrip(',') + ']')
+
+    lines = []
+    for line in file:
+        if line.startswith(']}'):  # Items are objects, so only the closing line starts like this
+            if lines:
+                yield from decode_batch(lines)
+            if line[2:].strip() or file.read().strip():
+                raise ValueError("Unexpected data after the saved inventory")
+            return
+        lines.append(line)
+        if len(lines) == LOAD_BATCH:
+            yield from decode_batch(lines)
+            lines = []
+    raise ValueError("The saved inventory ends too early")
+
+
+def iter_inventory(file, chunk_size=STREAM_CHUNK_SIZE):
+    """Parse a saved inventory incrementally, yielding ('owner', name) and ('item', item) as they are read.
+
+    Files written by dump_inventory are decoded a batch of lines at a time by the fast codec;
+    any other layout of the same JSON is parsed one value at a time.
+    """
+    first_line = file.readline(chunk_size)  # A document written on one line is not read whole
+    header = DUMP_HEADER.fullmatch(first_line)
+    if header:
+        yield 'owner', decode(header.group(1))
+        for data in _iter_dumped_items(file):
+            yield 'item', item_from_json(data)
+        return
+
+    stream = _JsonStream(file, chunk_size)
+    stream.buffer = first_line
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'backpack':
+            for data in stream.array():
+                yield 'item', item_from_json(data)
+        elif key == 'owner':
+            yield 'owner', stream.value()
+        else:
+            stream.value()  # Not part of an inventory; skipped
+        if stream.separator('}'):
+            return
+
+
+def load_inventory(file, chunk_size=STREAM_CHUNK_SIZE):
+    """Load an inventory written by dump_inventory or json.dump, without reading the whole file at once."""
+    owner = None
+    items = []
+    for kind, value in iter_inventory(file, chunk_size):
+        if kind == 'owner':
+            owner = value
+        else:
+            items.append(value)
+    inventory = Inventory(owner)
+    for item in items:
+        inventory.add_item(item)
+    return inventory
+
+
 if __name__ == "__main__":
     # Define various items
     belthronding = Weapon(name='Belthronding', rarity='legendary', damage=500, type='bow')
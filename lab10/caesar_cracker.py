@@ -0,0 +1,134 @@
+import os
+import sys
+import string
+import argparse
+from operator import mul
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from ceasar_functional import decrypt
+
+try:
+    import numpy
+except ImportError:  # Batches are then scored in pure Python across the process pool
+    numpy = None
+
+# Relative frequency of each letter a-z in English text
+ENGLISH_FREQUENCIES = [
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015, 0.06094, 0.06966, 0.00153,
+    0.00772, 0.04025, 0.02406, 0.06749, 0.07507, 0.01929, 0.00095, 0.05987, 0.06327, 0.09056,
+    0.02758, 0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+]
+INVERSE_FREQUENCIES = [1 / frequency for frequency in ENGLISH_FREQUENCIES]
+DEFAULT_SAMPLE_SIZE = 2000  # Characters of each ciphertext that are counted
+NUMPY_BATCH = 100_000  # Messages scored at once on the NumPy path, bounding its memory
+
+
+def letter_counts(text, sample_size=DEFAULT_SAMPLE_SIZE):
+    """How often each letter a-z occurs in the first sample_size characters, ignoring case."""
+    sample = text[:sample_size].lower()
+    return [sample.count(letter) for letter in string.ascii_lowercase]
+
+
+def chi_squared_scores(counts):
+    """Chi-squared distance from English of the text each key would decrypt to; index k scores key k.
+
+    Decrypting with key k turns ciphertext letter i + k into letter i, so the statistic is
+    sum((observed - expected)**2 / expected) = sum(observed**2 / expected) - total, with
+    observed = counts[(i + k) % 26] and expected = total * frequency of letter i.
+    """
+    total = sum(counts)
+    if not total:
+        return [0.0] * 26
+    squares = [count * count for count in counts]
+    return [sum(map(mul, squares[key:] + squares[:key], INVERSE_FREQUENCIES)) / total - total for key in range(26)]
+
+
+def rank_keys(ciphertext, sample_size=DEFAULT_SAMPLE_SIZE):
+    """All 26 keys as (chi-squared, key) pairs, most English-like decryption first."""
+    scores = chi_squared_scores(letter_counts(ciphertext, sample_size))
+    return sorted(zip(scores, range(26)))
+
+
+def best_key(ciphertext, sample_size=DEFAULT_SAMPLE_SIZE):
+    """The key whose decryption looks most like English; 0 when there are no letters."""
+    scores = chi_squared_scores(letter_counts(ciphertext, sample_size))
+    return min(range(26), key=scores.__getitem__)
+
+
+def crack(ciphertext, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Recover the key of a ciphertext and return (key, plaintext)."""
+    key = best_key(ciphertext, sample_size)
+    return key, decrypt(ciphertext, key)
+
+
+def _numpy_best_keys(ciphertexts, sample_size):
+    """best_key for many messages at once: one bincount for all letter counts, one matrix product for all scores."""
+    samples = [text[:sample_size].lower().encode('utf-8', 'surrogatepass') for text in ciphertexts]
+    lengths = numpy.fromiter(map(len, samples), dtype=numpy.int64, count=len(samples))
+    data = numpy.frombuffer(b''.join(samples), dtype=numpy.uint8)
+    message = numpy.repeat(numpy.arange(len(samples)), lengths)
+    letters = (data >= ord('a')) & (data <= ord('z'))
+    index = message[letters] * 26 + (data[letters] - ord('a'))
+    counts = numpy.bincount(index, minlength=len(samples) * 26).reshape(len(samples), 26).astype(numpy.float64)
+
+    # weights[j, k] is 1 / frequency of the letter that ciphertext letter j decrypts to under key k
+    shifts = (numpy.arange(26)[:, None] - numpy.arange(26)[None, :]) % 26
+    weights = numpy.array(INVERSE_FREQUENCIES)[shifts]
+    # Subtracting the total is the same for every key of a message, so it does not change the best key
+    return numpy.argmin((counts * counts) @ weights, axis=1).tolist()
+
+
+def best_keys(ciphertexts, workers=None, chunk_size=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    """best_key of every ciphertext, in order.
+
+    With NumPy the scoring is vectorized over batches of messages; without it the messages
+    are spread over a process pool.
+    """
+    ciphertexts = list(ciphertexts)
+    if numpy is not None:
+        keys = []
+        for start in range(0, len(ciphertexts), NUMPY_BATCH):
+            keys.extend(_numpy_best_keys(ciphertexts[start:start + NUMPY_BATCH], sample_size))
+        return keys
+
+    find = partial(best_key, sample_size=sample_size)
+    if workers == 1 or len(ciphertexts) < 1000:
+        return list(map(find, ciphertexts))
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, len(ciphertexts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(find, ciphertexts, chunksize=chunk_size))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recover the key of Caesar ciphertext by frequency analysis")
+    parser.add_argument('files', nargs='*', help="ciphertext files (default: standard input)")
+    parser.add_argument('--lines', action='store_true', help="crack every line as a separate message")
+    parser.add_argument('--rank', action='store_true', help="list all 26 keys with their scores instead")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="processes used with --lines when NumPy is not installed (default: number of CPUs)")
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help=f"characters of each message that are counted (default: {DEFAULT_SAMPLE_SIZE})")
+    args = parser.parse_args(argv)
+
+    texts = []
+    try:
+        for path in args.files or ['-']:
+            with (open(sys.stdin.fileno(), closefd=False) if path == '-' else open(path)) as file:
+                texts.extend(file.read().splitlines() if args.lines else [file.read()])
+    except (OSError, UnicodeDecodeError) as error:
+        parser.error(str(error))
+
+    if args.rank:
+        for text in texts:
+            print(' '.join(f"{key}:{score:.1f}" for score, key in rank_keys(text, args.sample_size)))
+        return 0
+    # One key and decryption per line, separated by a tab
+    for key, text in zip(best_keys(texts, args.workers, sample_size=args.sample_size), texts):
+        print(f"{key}\t{decrypt(text, key)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,169 @@
-def set_key(num):
-    """Calculate the key, ensuring it remains within the range 0-25."""
-    return num % 26
+import os
+import sys
+import mmap
+import argparse
+from functools import lru_cache, partial
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
+# The alphabets and the command line for files are shared with the Caesar class of lab03
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab03'))
+from caesar import DEFAULT_ALPHABETS, shifted_alphabets, add_file_arguments, file_jobs
 
-def shift_character(char, shift, lower_bound, upper_bound):
-    """Shift a character within specified bounds."""
-    shifted = ord(char) + shift
-    if shifted > upper_bound:
-        shifted = lower_bound + (shifted - upper_bound - 1)
-    elif shifted < lower_bound:
-        shifted = upper_bound - (lower_bound - shifted - 1)
-    return chr(shifted)
+CHUNK_SIZE = 1 << 22  # Bytes read per chunk when translating files
 
 
-def encrypt(plaintext, key):
+def translation_tables(shift, alphabets=DEFAULT_ALPHABETS):
+    """str.translate and bytes.translate tables rotating each alphabet by shift within itself.
+
+    Alphabets are names from caesar.ALPHABETS or the characters of a custom alphabet; characters in no
+    alphabet map to themselves, so case and punctuation survive. The bytes table is None unless
+    every alphabet is ASCII. Tables are built once per (alphabets, shift) pair.
+    """
+    return _translation_tables(tuple(alphabets), shift)
+
+
+@lru_cache(maxsize=1024)
+def _translation_tables(alphabets, shift):
+    source, target = shifted_alphabets(alphabets, shift)
+    bytes_table = bytes.maketrans(source.encode(), target.encode()) if source.isascii() else None
+    return str.maketrans(source, target), bytes_table
+
+
+def bytes_translation_table(shift, alphabets=DEFAULT_ALPHABETS):
+    """bytes.translate table rotating each alphabet by shift; the alphabets must be ASCII."""
+    table = translation_tables(shift, alphabets)[1]
+    if table is None:
+        raise ValueError("Translating bytes needs ASCII alphabets")
+    return table
+
+
+def shift_text(text, shift, alphabets=DEFAULT_ALPHABETS):
+    """Rotate each alphabet's characters in text by shift, leaving every other character as it is.
+
+    With ASCII alphabets the text goes through bytes, where a C-level translate with a 256-entry
+    table is several times faster than str.translate. UTF-8 never uses ASCII byte values inside a
+    multi-byte character, so that is safe for any text.
+    """
+    text_table, bytes_table = translation_tables(shift, alphabets)
+    if bytes_table is None:
+        return text.translate(text_table)
+    if text.isascii():
+        return text.encode('ascii').translate(bytes_table).decode('ascii')
+    return text.encode('utf-8', 'surrogatepass').translate(bytes_table).decode('utf-8', 'surrogatepass')
+
+
+def encrypt(plaintext, key, alphabets=DEFAULT_ALPHABETS):
     """Encrypt the given plaintext using the Caesar cipher."""
-    key = set_key(key)
-    return ''.join(
-        shift_character(c, key, 97, 122) if 'a' <= c <= 'z' else c
-        for c in plaintext.lower()
-    )
+    return shift_text(plaintext, key, alphabets)
 
 
-def decrypt(ciphertext, key):
+def decrypt(ciphertext, key, alphabets=DEFAULT_ALPHABETS):
     """Decrypt the given ciphertext using the Caesar cipher."""
-    key = set_key(key)
-    return ''.join(
-        shift_character(c, -key, 97, 122) if 'a' <= c <= 'z' else c
-        for c in ciphertext.lower()
-    )
+    return shift_text(ciphertext, -key, alphabets)
 
 
-if __name__ == "__main__":
+def encrypt_bytes(data, key, alphabets=DEFAULT_ALPHABETS):
+    """Encrypt a bytes-like object of ASCII or UTF-8 text."""
+    return bytes(data).translate(bytes_translation_table(key, alphabets))
+
+
+def decrypt_bytes(data, key, alphabets=DEFAULT_ALPHABETS):
+    """Decrypt a bytes-like object of ASCII or UTF-8 text."""
+    return bytes(data).translate(bytes_translation_table(-key, alphabets))
+
+
+def translate_file(source, destination, shift, chunk_size=CHUNK_SIZE, alphabets=DEFAULT_ALPHABETS):
+    """Copy binary file source to destination, rotating its alphabets by shift (negative to decrypt).
+
+    Each byte is translated on its own, so chunks can be cut anywhere, even inside a UTF-8 character.
+    Returns the number of bytes copied.
+    """
+    table = bytes_translation_table(shift, alphabets)
+    total = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return total
+        destination.write(chunk.translate(table))
+        total += len(chunk)
+
+
+def _open_binary(path, mode):
+    """Open path in binary mode, or use standard input or output for '-'."""
+    if path == '-':
+        return nullcontext(sys.stdin.buffer if mode == 'rb' else sys.stdout.buffer)
+    return open(path, mode)
+
+
+def translate_path(source, destination, shift, use_mmap=False, chunk_size=CHUNK_SIZE, alphabets=DEFAULT_ALPHABETS):
+    """Rotate the alphabets of file source by shift into file destination, in constant memory.
+
+    Either path may be '-' for standard input or output. use_mmap maps a regular source file
+    instead of reading it, which saves a copy per chunk. Returns the number of bytes written.
+    """
+    if source != '-' and destination != '-' and os.path.exists(destination) and os.path.samefile(source, destination):
+        raise ValueError(f"{source} would be overwritten while it is read")
+    with _open_binary(source, 'rb') as infile, _open_binary(destination, 'wb') as outfile:
+        if use_mmap and source != '-' and os.fstat(infile.fileno()).st_size:
+            table = bytes_translation_table(shift, alphabets)
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), chunk_size):
+                    outfile.write(mapped[start:start + chunk_size].translate(table))
+                return len(mapped)
+        return translate_file(infile, outfile, shift, chunk_size, alphabets)
+
+
+def _translate_job(job, shift, use_mmap, chunk_size, alphabets):
+    try:
+        return {"Bytes": translate_path(*job, shift, use_mmap, chunk_size, alphabets)}
+    except (OSError, ValueError) as error:
+        return {"Error": f"{type(error).__name__}: {error}"}
+
+
+def translate_paths(jobs, shift, workers=None, use_mmap=False, chunk_size=CHUNK_SIZE, alphabets=DEFAULT_ALPHABETS):
+    """Translate each (source, destination) pair of jobs, across a process pool when there are several.
+
+    Yields (source, {"Bytes": written} or {"Error": message}) in the order of jobs.
+    """
+    work = partial(_translate_job, shift=shift, use_mmap=use_mmap, chunk_size=chunk_size, alphabets=alphabets)
+    sources = [source for source, _ in jobs]
+    if workers == 1 or len(jobs) <= 1:
+        yield from zip(sources, map(work, jobs))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(sources, executor.map(work, jobs))
+
+
+def run_files(argv):
+    """Encrypt or decrypt files or standard input from the command line. Returns the exit status."""
+    parser = add_file_arguments(argparse.ArgumentParser(description="Caesar cipher for files and pipes"))
+    parser.add_argument('--mmap', action='store_true', help="map input files into memory instead of reading them")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"bytes translated at a time (default: {CHUNK_SIZE})")
+    args = parser.parse_intermixed_args(argv)  # Files may come after the options
+    jobs = file_jobs(parser, args)
+
+    alphabets = tuple(args.alphabet or DEFAULT_ALPHABETS)
+    try:
+        bytes_translation_table(0, alphabets)
+    except ValueError as error:
+        parser.error(str(error))
+
+    shift = args.key if args.mode == 'encrypt' else -args.key
+    failed = 0
+    for source, result in translate_paths(jobs, shift, args.workers, args.mmap, args.chunk_size, alphabets):
+        if "Error" in result:
+            print(f"{source}: {result['Error']}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_files(argv))
+
     key = int(input("Please enter the key: "))
     string = input("Please enter the string that you would like to encrypt: ")
 
@@ -44,3 +176,7 @@ if __name__ == "__main__":
         print(f"Decrypted: {decrypted}")
     else:
         print("Have a nice day.")
+
+
+if __name__ == "__main__":
+    main()